@@ -0,0 +1,144 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional, Sequence
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal
+from app.models.player import Game, Player, Room
+
+router = APIRouter()
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+Player1 = aliased(Player)
+Player2 = aliased(Player)
+
+# One flat row per game: usernames come from the same statement (no N+1)
+GAME_COLUMNS = (
+    Game.id,
+    Room.code.label("room_code"),
+    Game.variant,
+    Game.status,
+    Game.result,
+    Game.player1_id,
+    Player1.username.label("player1_username"),
+    Game.player2_id,
+    Player2.username.label("player2_username"),
+    Game.winner_id,
+    Game.total_moves,
+    Game.board_state,
+    Game.created_at,
+    Game.started_at,
+    Game.finished_at,
+)
+
+PLAYER_COLUMNS = (
+    Player.id,
+    Player.username,
+    Player.display_name,
+    Player.total_games,
+    Player.wins,
+    Player.losses,
+    Player.draws,
+    Player.rating,
+    Player.created_at,
+    Player.last_seen,
+)
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+async def export_chunks(query: Select, id_column, chunk_size: int) -> AsyncIterator[Sequence]:
+    """
+    Rows of `query` in id order, chunk_size at a time.
+    Each chunk is a keyset query on its own short session, so a pooled
+    connection is only held while a chunk is read, never while the client
+    downloads it, and only one chunk is in memory at a time.
+    """
+    last_id = None
+    while True:
+        chunk_query = query.order_by(id_column).limit(chunk_size)
+        if last_id is not None:
+            chunk_query = chunk_query.where(id_column > last_id)
+
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(chunk_query)).all()
+        if not rows:
+            return
+
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1].id
+
+
+async def render(query: Select, id_column, columns: Sequence[str], format: str) -> AsyncIterator[str]:
+    """Serialize the export one chunk per yielded string"""
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        async for rows in export_chunks(query, id_column, settings.EXPORT_CHUNK_SIZE):
+            writer.writerows([export_value(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        async for rows in export_chunks(query, id_column, settings.EXPORT_CHUNK_SIZE):
+            yield "".join(
+                json.dumps({column: export_value(value) for column, value in zip(columns, row)}) + "\n"
+                for row in rows
+            )
+
+
+def export_response(query: Select, id_column, format: str, name: str) -> StreamingResponse:
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+    columns = [column.name for column in query.selected_columns]
+    return StreamingResponse(
+        render(query, id_column, columns, format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'}
+    )
+
+
+@router.get("/games")
+async def export_games(format: str = "ndjson", since: Optional[datetime] = None):
+    """Stream every game as NDJSON or CSV; since keeps games finished at or after that time"""
+    query = (
+        select(*GAME_COLUMNS)
+        .select_from(Game)
+        # Games without a room are exported too, with an empty room_code
+        .outerjoin(Room, Room.id == Game.room_id)
+        .join(Player1, Player1.id == Game.player1_id)
+        .outerjoin(Player2, Player2.id == Game.player2_id)
+    )
+    if since is not None:
+        query = query.where(Game.finished_at >= since)
+    return export_response(query, Game.id, format, "games")
+
+
+@router.get("/players")
+async def export_players(format: str = "ndjson"):
+    """Stream every player as NDJSON or CSV"""
+    return export_response(select(*PLAYER_COLUMNS), Player.id, format, "players")
@@ -1,14 +1,28 @@
+import json
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import desc, select, tuple_
+from typing import List, Optional
 
-from app.database.session import get_db
-from app.models.player import Game, Player, GameStatus
+from app.api.pagination import decode_cursor, encode_cursor, parse_cursor_datetime
+from app.database.session import AsyncSessionLocal, get_db
+from app.models.player import Game, GameStatus, Move
+from app.services.board_engine import create_board
+from app.services.move_log import move_log
 from pydantic import BaseModel
 
 router = APIRouter()
 
+# Load player1/player2/winner in the same statement as the game
+PLAYER_OPTIONS = (
+    joinedload(Game.player1),
+    joinedload(Game.player2),
+    joinedload(Game.winner),
+)
+
 class GameResponse(BaseModel):
     id: int
     player1_username: str
@@ -22,54 +36,71 @@ class GameResponse(BaseModel):
     class Config:
         from_attributes = True
 
-@router.get("/", response_model=List[GameResponse])
+class GamePage(BaseModel):
+    items: List[GameResponse]
+    next_cursor: Optional[str] = None
+
+@router.get("/", response_model=GamePage)
 async def get_games(
     skip: int = 0,
     limit: int = 50,
     status: str = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get list of games"""
-    query = db.query(Game)
+    """Get list of games, newest first (pass next_cursor back as cursor for the next page)"""
+    query = select(Game).options(*PLAYER_OPTIONS)
     
     if status:
         try:
             game_status = GameStatus(status)
-            query = query.filter(Game.status == game_status)
+            query = query.where(Game.status == game_status)
         except ValueError:
             pass
     
-    games = query.order_by(desc(Game.created_at)).offset(skip).limit(limit).all()
+    # Keyset pagination on (created_at, id), served by ix_games_created_at_id
+    if cursor:
+        created_at, game_id = decode_cursor(cursor, str, int)
+        query = query.where(
+            tuple_(Game.created_at, Game.id) < tuple_(parse_cursor_datetime(created_at), game_id)
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether there is a next page
+    games = (await db.scalars(
+        query.order_by(desc(Game.created_at), desc(Game.id)).limit(limit + 1)
+    )).all()
+    has_more = len(games) > limit
+    games = games[:limit]
     
     result = []
     for game in games:
-        player1 = db.query(Player).get(game.player1_id)
-        player2 = db.query(Player).get(game.player2_id) if game.player2_id else None
-        winner = db.query(Player).get(game.winner_id) if game.winner_id else None
-        
         result.append({
             "id": game.id,
-            "player1_username": player1.username if player1 else "Unknown",
-            "player2_username": player2.username if player2 else None,
+            "player1_username": game.player1.username if game.player1 else "Unknown",
+            "player2_username": game.player2.username if game.player2 else None,
             "status": game.status.value,
-            "winner_username": winner.username if winner else None,
+            "winner_username": game.winner.username if game.winner else None,
             "total_moves": game.total_moves,
             "started_at": game.started_at.isoformat() if game.started_at else None,
             "finished_at": game.finished_at.isoformat() if game.finished_at else None
         })
     
-    return result
+    next_cursor = None
+    if has_more and games:
+        next_cursor = encode_cursor(games[-1].created_at, games[-1].id)
+
+    return {"items": result, "next_cursor": next_cursor}
 
 @router.get("/{game_id}")
-async def get_game(game_id: int, db: Session = Depends(get_db)):
+async def get_game(game_id: int, db: AsyncSession = Depends(get_db)):
     """Get game details by ID"""
-    game = db.query(Game).get(game_id)
+    game = await db.get(Game, game_id, options=PLAYER_OPTIONS)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    player1 = db.query(Player).get(game.player1_id)
-    player2 = db.query(Player).get(game.player2_id) if game.player2_id else None
-    winner = db.query(Player).get(game.winner_id) if game.winner_id else None
+    player1, player2, winner = game.player1, game.player2, game.winner
     
     return {
         "id": game.id,
@@ -87,10 +118,43 @@ async def get_game(game_id: int, db: Session = Depends(get_db)):
         } if winner else None,
         "status": game.status.value,
         "result": game.result.value if game.result else None,
+        "variant": game.variant,
         "board_state": game.board_state,
         "current_turn": game.current_turn,
         "total_moves": game.total_moves,
         "started_at": game.started_at,
         "finished_at": game.finished_at,
         "created_at": game.created_at
-    }
\ No newline at end of file
+    }
+
+@router.get("/{game_id}/moves")
+async def replay_game(game_id: int):
+    """Stream the moves of a game in order as NDJSON, each with the board after it"""
+    # Only the streaming session stays open while the response is sent
+    async with AsyncSessionLocal() as session:
+        game = (await session.execute(select(Game.id, Game.variant).where(Game.id == game_id))).first()
+    if game is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    variant = game.variant
+
+    # Include moves still waiting in the batch writer
+    await move_log.flush()
+
+    async def stream_moves():
+        board = create_board(variant)
+        async with AsyncSessionLocal() as session:
+            moves = await session.stream_scalars(
+                select(Move).where(Move.game_id == game_id).order_by(Move.ply)
+            )
+            async for move in moves:
+                player = 1 if move.ply % 2 else 2  # player1 always opens
+                board.place(move.position, player)
+                yield json.dumps({
+                    "ply": move.ply,
+                    "player": player,
+                    "player_id": move.player_id,
+                    "position": move.position,
+                    "board": board.to_string()
+                }) + "\n"
+
+    return StreamingResponse(stream_moves(), media_type="application/x-ndjson")
\ No newline at end of file
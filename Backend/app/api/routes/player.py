@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Optional
 
+from app.api.pagination import decode_cursor, encode_cursor
 from app.database.session import get_db
 from app.models.player import Player
+from app.services.leaderboard import leaderboard
+from app.services.lookups import is_reserved_username
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -21,34 +25,64 @@ class PlayerResponse(BaseModel):
     losses: int
     draws: int
     win_rate: float
+    rating: float
 
     class Config:
         from_attributes = True
 
-@router.get("/", response_model=List[PlayerResponse])
-async def get_players(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get list of all players"""
-    players = db.query(Player).offset(skip).limit(limit).all()
-    return players
+class PlayerPage(BaseModel):
+    items: List[PlayerResponse]
+    next_cursor: Optional[str] = None
+
+@router.get("/", response_model=PlayerPage)
+async def get_players(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get list of all players by id (pass next_cursor back as cursor for the next page)"""
+    query = select(Player).order_by(Player.id)
+
+    # Keyset pagination on the primary key
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(Player.id > last_id)
+    elif skip:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether there is a next page
+    players = (await db.scalars(query.limit(limit + 1))).all()
+    has_more = len(players) > limit
+    players = players[:limit]
+
+    return {
+        "items": players,
+        "next_cursor": encode_cursor(players[-1].id) if has_more and players else None
+    }
 
 @router.get("/{player_id}", response_model=PlayerResponse)
-async def get_player(player_id: int, db: Session = Depends(get_db)):
+async def get_player(player_id: int, db: AsyncSession = Depends(get_db)):
     """Get player by ID"""
-    player = db.query(Player).filter(Player.id == player_id).first()
+    player = await db.get(Player, player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
     return player
 
 @router.post("/", response_model=PlayerResponse)
-async def create_player(player: PlayerCreate, db: Session = Depends(get_db)):
+async def create_player(player: PlayerCreate, db: AsyncSession = Depends(get_db)):
     """Create a new player"""
+    if is_reserved_username(player.username):
+        raise HTTPException(status_code=400, detail="This username is reserved")
+
     # Check if username exists
-    existing = db.query(Player).filter(Player.username == player.username).first()
+    existing = await db.scalar(select(Player).where(Player.username == player.username))
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
     
     db_player = Player(**player.dict())
     db.add(db_player)
-    db.commit()
-    db.refresh(db_player)
+    await db.commit()
+    await db.refresh(db_player)
+    leaderboard.update_player(db_player)
     return db_player
\ No newline at end of file
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import List, Optional
 from pydantic import BaseModel
 
 from app.database.session import get_db
-from app.models.player import Room, Player, GameStatus
+from app.models.player import Room, GameStatus
+from app.services.board_engine import DEFAULT_VARIANT, VARIANTS
+from app.services.lookups import cache_room, find_room, get_or_create_player, is_reserved_username
+from app.services.room_directory import room_directory
 
 router = APIRouter()
 
@@ -13,6 +17,7 @@ class RoomCreate(BaseModel):
     code: str
     is_public: bool = True
     created_by: str
+    variant: str = DEFAULT_VARIANT
 
 class RoomResponse(BaseModel):
     id: int
@@ -20,37 +25,21 @@ class RoomResponse(BaseModel):
     name: str
     is_public: bool
     status: str
+    variant: str = DEFAULT_VARIANT
     players_count: Optional[int] = 0
 
     class Config:
         from_attributes = True
 
 @router.get("/", response_model=List[RoomResponse])
-async def get_rooms(db: Session = Depends(get_db)):
-    """Get list of active rooms"""
-    rooms = db.query(Room).filter(
-        Room.status.in_([GameStatus.WAITING, GameStatus.IN_PROGRESS])
-    ).all()
-    
-    # Add players count
-    result = []
-    for room in rooms:
-        room_dict = {
-            "id": room.id,
-            "code": room.code,
-            "name": room.name,
-            "is_public": room.is_public,
-            "status": room.status.value,
-            "players_count": 1 if room.game and room.game.player2_id else 0
-        }
-        result.append(room_dict)
-    
-    return result
+async def get_rooms():
+    """Get list of active public rooms (served from the in-memory room directory)"""
+    return room_directory.list()
 
 @router.get("/{room_code}")
-async def get_room(room_code: str, db: Session = Depends(get_db)):
+async def get_room(room_code: str, db: AsyncSession = Depends(get_db)):
     """Get room by code"""
-    room = db.query(Room).filter(Room.code == room_code).first()
+    room = await db.scalar(select(Room).where(Room.code == room_code))
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     
@@ -60,36 +49,38 @@ async def get_room(room_code: str, db: Session = Depends(get_db)):
         "name": room.name,
         "is_public": room.is_public,
         "status": room.status.value,
+        "variant": room.variant,
         "created_at": room.created_at
     }
 
 @router.post("/", response_model=RoomResponse)
-async def create_room(room: RoomCreate, db: Session = Depends(get_db)):
+async def create_room(room: RoomCreate, db: AsyncSession = Depends(get_db)):
     """Create a new room"""
+    if room.variant not in VARIANTS:
+        raise HTTPException(status_code=400, detail="Unknown variant")
+    if is_reserved_username(room.created_by):
+        raise HTTPException(status_code=400, detail="This username is reserved")
+
     # Check if code already exists
-    existing = db.query(Room).filter(Room.code == room.code).first()
-    if existing:
+    if await find_room(db, room.code):
         raise HTTPException(status_code=400, detail="Room code already exists")
     
     # Get or create player
-    player = db.query(Player).filter(Player.username == room.created_by).first()
-    if not player:
-        player = Player(username=room.created_by, display_name=room.created_by)
-        db.add(player)
-        db.commit()
-        db.refresh(player)
+    player = await get_or_create_player(db, room.created_by)
     
     # Create room
     db_room = Room(
         name=room.name,
         code=room.code,
         is_public=room.is_public,
+        variant=room.variant,
         created_by=player.id,
         status=GameStatus.WAITING
     )
     db.add(db_room)
-    db.commit()
-    db.refresh(db_room)
+    await db.commit()
+    cache_room(db_room)
+    await room_directory.add(db_room)
     
     return {
         "id": db_room.id,
@@ -97,5 +88,6 @@ async def create_room(room: RoomCreate, db: Session = Depends(get_db)):
         "name": db_room.name,
         "is_public": db_room.is_public,
         "status": db_room.status.value,
+        "variant": db_room.variant,
         "players_count": 0
     }
\ No newline at end of file
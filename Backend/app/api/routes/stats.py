@@ -1,40 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import func, desc, select
 from typing import List
 
-from app.database.session import get_db
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal, get_db
 from app.models.player import Player, Game, Room, GameStatus
+from app.services.cache import TTLCache
+from app.services.leaderboard import leaderboard
 
 router = APIRouter()
 
-@router.get("/general")
-async def get_general_stats(db: Session = Depends(get_db)):
-    """Get general statistics"""
-    total_players = db.query(func.count(Player.id)).scalar()
-    total_games = db.query(func.count(Game.id)).scalar()
-    finished_games = db.query(func.count(Game.id)).filter(
-        Game.status == GameStatus.FINISHED
-    ).scalar()
-    active_rooms = db.query(func.count(Room.id)).filter(
-        Room.status == GameStatus.IN_PROGRESS
-    ).scalar()
+# DB counters behind /general, refreshed at most once per TTL window
+general_stats_cache = TTLCache(ttl=settings.STATS_CACHE_TTL_SECONDS, maxsize=1)
+
+async def load_general_counts() -> dict:
+    """All general counters in one aggregate statement"""
+    query = select(
+        select(func.count(Player.id)).scalar_subquery(),
+        select(func.count(Game.id)).scalar_subquery(),
+        select(func.count(Game.id)).where(
+            Game.status == GameStatus.FINISHED
+        ).scalar_subquery(),
+        select(func.count(Room.id)).where(
+            Room.status == GameStatus.IN_PROGRESS
+        ).scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        total_players, total_games, finished_games, active_rooms = (await db.execute(query)).one()
 
     return {
         "total_players": total_players,
         "total_games": total_games,
         "finished_games": finished_games,
-        "active_rooms": active_rooms,
-        "active_players": active_rooms * 2  # Approximate
+        "active_rooms": active_rooms
+    }
+
+@router.get("/general")
+async def get_general_stats(request: Request):
+    """Get general statistics"""
+    counts = await general_stats_cache.get_or_load("general", load_general_counts)
+
+    # Live count of connected players in rooms, across all workers
+    active_players = await request.app.state.game_handler.count_active_players()
+
+    return {
+        **counts,
+        "active_players": active_players
     }
 
 @router.get("/ranking")
-async def get_ranking(limit: int = 10, db: Session = Depends(get_db)):
-    """Get player ranking by wins"""
-    players = db.query(Player).order_by(
-        desc(Player.wins),
-        desc(Player.total_games)
-    ).limit(limit).all()
+async def get_ranking(limit: int = 10, order_by: str = "wins", db: AsyncSession = Depends(get_db)):
+    """
+    Get player ranking by wins (served from the in-memory leaderboard),
+    or by Elo rating with order_by=rating (read from the rating index)
+    """
+    if order_by == "rating":
+        players = (await db.scalars(
+            select(Player).order_by(desc(Player.rating), desc(Player.id)).limit(max(limit, 0))
+        )).all()
+    elif order_by == "wins":
+        players = leaderboard.top('ranking', limit)
+    else:
+        raise HTTPException(status_code=400, detail="order_by must be wins or rating")
 
     return [
         {
@@ -46,23 +75,28 @@ async def get_ranking(limit: int = 10, db: Session = Depends(get_db)):
             "losses": player.losses,
             "draws": player.draws,
             "win_rate": player.win_rate,
-            "rank_score": player.rank_score
+            "rank_score": player.rank_score,
+            "rating": round(player.rating, 1)
         }
         for idx, player in enumerate(players)
     ]
 
 @router.get("/player/{player_id}")
-async def get_player_stats(player_id: int, db: Session = Depends(get_db)):
+async def get_player_stats(player_id: int, db: AsyncSession = Depends(get_db)):
     """Get detailed stats for a player"""
-    player = db.query(Player).get(player_id)
+    player = await db.get(Player, player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    recent_games = db.query(Game).filter(
+    recent_games = (await db.scalars(select(Game).options(
+        joinedload(Game.player1),
+        joinedload(Game.player2)
+    ).where(
         (Game.player1_id == player_id) | (Game.player2_id == player_id)
-    ).filter(
-        Game.status == GameStatus.FINISHED
-    ).order_by(desc(Game.finished_at)).limit(10).all()
+    ).where(
+        # Rooms that expired waiting finish their game with no opponent: never played
+        Game.status == GameStatus.FINISHED, Game.player2_id.is_not(None)
+    ).order_by(desc(Game.finished_at)).limit(10))).all()
 
     return {
         "player": {
@@ -75,6 +109,7 @@ async def get_player_stats(player_id: int, db: Session = Depends(get_db)):
             "draws": player.draws,
             "win_rate": player.win_rate,
             "rank_score": player.rank_score,
+            "rating": round(player.rating, 1),
             "created_at": player.created_at,
             "last_seen": player.last_seen
         },
@@ -82,9 +117,9 @@ async def get_player_stats(player_id: int, db: Session = Depends(get_db)):
             {
                 "id": game.id,
                 "opponent": (
-                    db.query(Player).get(game.player2_id).username
+                    game.player2.username
                     if game.player1_id == player_id
-                    else db.query(Player).get(game.player1_id).username
+                    else game.player1.username
                 ),
                 "result": (
                     "win" if game.winner_id == player_id
@@ -99,18 +134,19 @@ async def get_player_stats(player_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/leaderboard")
-async def get_leaderboard(db: Session = Depends(get_db)):
-    """Get comprehensive leaderboard with multiple categories"""
+async def get_leaderboard():
+    """Get comprehensive leaderboard with multiple categories (served from memory)"""
     # Most wins
-    most_wins = db.query(Player).order_by(desc(Player.wins)).limit(5).all()
+    most_wins = leaderboard.top('most_wins', 5)
     
     # Best win rate (min 10 games)
-    best_win_rate = db.query(Player).filter(
-        Player.total_games >= 10
-    ).order_by(desc(Player.wins / Player.total_games)).limit(5).all()
+    best_win_rate = leaderboard.top('best_win_rate', 5)
     
     # Most games played
-    most_games = db.query(Player).order_by(desc(Player.total_games)).limit(5).all()
+    most_games = leaderboard.top('most_active', 5)
+
+    # Highest rank score
+    best_rank_score = leaderboard.top('rank_score', 5)
 
     return {
         "most_wins": [
@@ -135,5 +171,13 @@ async def get_leaderboard(db: Session = Depends(get_db)):
                 "total_games": p.total_games
             }
             for p in most_games
+        ],
+        "best_rank_score": [
+            {
+                "username": p.username,
+                "rank_score": p.rank_score,
+                "total_games": p.total_games
+            }
+            for p in best_rank_score
         ]
     }
\ No newline at end of file
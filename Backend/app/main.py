@@ -1,30 +1,105 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import socketio
 from contextlib import asynccontextmanager
+from sqlalchemy import event
 
 from app.core.config import settings
-from app.database.session import engine, Base
-from app.api.routes import game, player, room, stats
+from app.database.session import engine, Base, AsyncSessionLocal
+from app.api.routes import export, game, player, room, stats
+from app.services.leaderboard import leaderboard
+from app.services.metrics import MetricsMiddleware, count_statement, instrument_event, registry
+from app.services.move_log import move_log
+from app.services.player_stats import player_stats
+from app.services.reaper import Reaper
+from app.services.room_directory import room_directory
+from app.services.solver import solver
+from app.websocket.cluster import create_client_manager, create_cluster
 from app.websocket.game_handler import GameHandler
 
+# Shared state and messaging between workers
+cluster = create_cluster()
+
 # Create Socket.IO server
 sio = socketio.AsyncServer(
     async_mode='asgi',
-    cors_allowed_origins=settings.CORS_ORIGINS
+    cors_allowed_origins=settings.CORS_ORIGINS,
+    client_manager=create_client_manager(cluster)
 )
 
 # Initialize game handler
-game_handler = GameHandler(sio)
+game_handler = GameHandler(sio, cluster)
+
+# Lobby clients get room directory changes pushed as they happen
+room_directory.on_change = game_handler.handle_room_change
+
+# Expires rooms and games players walked away from
+reaper = Reaper()
+
+# Metrics: gauges are read only when /metrics is scraped
+event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+
+def pool_stat(name: str):
+    """Pool counter that is 0 for pools without it (SQLite's NullPool)"""
+    def read():
+        stat = getattr(engine.pool, name, None)
+        return max(stat(), 0) if stat else 0
+    return read
+
+
+registry.gauge('socketio_active_connections', 'Socket.IO clients in a room on this worker',
+               lambda: len(game_handler.active_connections))
+registry.gauge('socketio_rooms', 'Rooms with clients on this worker', lambda: len(game_handler.rooms))
+registry.gauge('games_in_progress', 'Live games owned by this worker', lambda: len(game_handler.live_games))
+registry.gauge('matchmaking_queue_size', 'Players waiting in the matchmaking queue on this worker',
+               lambda: len(game_handler.matchmaking))
+registry.gauge('broadcast_pending_events', 'Room events queued and not sent yet on this worker',
+               lambda: game_handler.broadcaster.pending)
+registry.gauge('spectators', 'Clients watching a game on this worker', lambda: len(game_handler.spectating))
+registry.gauge('spectator_pending_events', 'Game events queued for spectators and not sent yet on this worker',
+               lambda: game_handler.spectators.pending)
+registry.gauge('resume_sessions', 'Seated players that can resume on this worker', lambda: len(game_handler.sessions))
+registry.gauge('lobby_rooms', 'Open public rooms in the room directory', lambda: len(room_directory))
+registry.gauge('db_pool_checked_out', 'Connections checked out of the pool', pool_stat('checkedout'))
+registry.gauge('db_pool_overflow', 'Connections open beyond the pool size', pool_stat('overflow'))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     print("✅ Database tables created")
+    async with AsyncSessionLocal() as db:
+        await leaderboard.rebuild(db)
+        await room_directory.rebuild(db)
+    print(f"✅ Leaderboard loaded ({len(leaderboard)} players)")
+    print(f"✅ Room directory loaded ({len(room_directory)} open rooms)")
+    solver.build()
+    print(f"✅ Bot solver ready ({solver.positions} positions)")
+    await cluster.start(game_handler.handle_cluster_message)
+    await move_log.start()
+    await player_stats.start()
+    await game_handler.matchmaking.start(game_handler.create_matches)
+    await reaper.start(game_handler.reap)
+    print(f"✅ Worker {cluster.worker_id} joined the cluster")
     yield
     # Shutdown
     print("👋 Shutting down...")
+    await reaper.stop()
+    await game_handler.matchmaking.stop()
+    await game_handler.broadcaster.stop()
+    await game_handler.spectators.stop()
+    await cluster.stop()
+    # Drain the write-behind buffers before the pool goes away: stat deltas
+    # first, and each writer on its own so one failing can't lose the other's rows
+    for writer in (player_stats, move_log):
+        try:
+            await writer.stop()
+        except Exception as e:
+            print(f"Error draining {writer.name}: {str(e)}")
+    await engine.dispose()
 
 # Create FastAPI app
 app = FastAPI(
@@ -34,6 +109,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Shared with routes that read live connection state
+app.state.game_handler = game_handler
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -42,12 +120,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Include API routes
 app.include_router(player.router, prefix="/api/players", tags=["players"])
 app.include_router(game.router, prefix="/api/games", tags=["games"])
 app.include_router(room.router, prefix="/api/rooms", tags=["rooms"])
 app.include_router(stats.router, prefix="/api/stats", tags=["statistics"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
 
 # Socket.IO events
 @sio.event
@@ -56,30 +136,71 @@ async def connect(sid, environ):
     await sio.emit('connected', {'sid': sid}, room=sid)
 
 @sio.event
+@instrument_event('disconnect')
 async def disconnect(sid):
     print(f"Client disconnected: {sid}")
     await game_handler.handle_disconnect(sid)
 
 @sio.event
+@instrument_event('join_room')
 async def join_room(sid, data):
     await game_handler.handle_join_room(sid, data)
 
 @sio.event
+@instrument_event('leave_room')
 async def leave_room(sid, data):
     await game_handler.handle_leave_room(sid, data)
 
 @sio.event
+@instrument_event('join_queue')
+async def join_queue(sid, data):
+    await game_handler.handle_join_queue(sid, data)
+
+@sio.event
+@instrument_event('leave_queue')
+async def leave_queue(sid, data):
+    await game_handler.handle_leave_queue(sid, data)
+
+@sio.event
+@instrument_event('make_move')
 async def make_move(sid, data):
     await game_handler.handle_make_move(sid, data)
 
 @sio.event
+@instrument_event('ready')
 async def ready(sid, data):
     await game_handler.handle_ready(sid, data)
 
 @sio.event
+@instrument_event('chat_message')
 async def chat_message(sid, data):
     await game_handler.handle_chat_message(sid, data)
 
+@sio.event
+@instrument_event('resume')
+async def resume(sid, data):
+    await game_handler.handle_resume(sid, data)
+
+@sio.event
+@instrument_event('spectate')
+async def spectate(sid, data):
+    await game_handler.handle_spectate(sid, data)
+
+@sio.event
+@instrument_event('stop_spectating')
+async def stop_spectating(sid, data=None):
+    await game_handler.handle_stop_spectating(sid, data)
+
+@sio.event
+@instrument_event('join_lobby')
+async def join_lobby(sid, data=None):
+    await game_handler.handle_join_lobby(sid, data)
+
+@sio.event
+@instrument_event('leave_lobby')
+async def leave_lobby(sid, data=None):
+    await game_handler.handle_leave_lobby(sid, data)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -94,6 +215,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Mount Socket.IO app
 socket_app = socketio.ASGIApp(sio, app)
 
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Boolean, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
+from app.core.config import settings
 from app.database.session import Base
 
 class GameStatus(enum.Enum):
@@ -25,9 +26,14 @@ class Player(Base):
     wins = Column(Integer, default=0)
     losses = Column(Integer, default=0)
     draws = Column(Integer, default=0)
+    rating = Column(Float, nullable=False, default=settings.RATING_INITIAL,
+                    server_default=str(settings.RATING_INITIAL))  # Elo
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_seen = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Ranking by rating reads this index backwards
+    __table_args__ = (Index("ix_players_rating_id", "rating", "id"),)
+
     # Relationships
     games_as_player1 = relationship("Game", foreign_keys="Game.player1_id", back_populates="player1")
     games_as_player2 = relationship("Game", foreign_keys="Game.player2_id", back_populates="player2")
@@ -51,6 +57,7 @@ class Room(Base):
     name = Column(String(100), nullable=False)
     is_public = Column(Boolean, default=True)
     max_players = Column(Integer, default=2)
+    variant = Column(String(20), default="classic")  # Key of app.services.board_engine.VARIANTS
     status = Column(Enum(GameStatus), default=GameStatus.WAITING)
     created_by = Column(Integer, ForeignKey("players.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -63,6 +70,10 @@ class Room(Base):
 
 class Game(Base):
     __tablename__ = "games"
+    __table_args__ = (
+        # Keyset pagination of /api/games (newest first)
+        Index("ix_games_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id"), unique=True)
@@ -71,7 +82,9 @@ class Game(Base):
     winner_id = Column(Integer, ForeignKey("players.id"), nullable=True)
     status = Column(Enum(GameStatus), default=GameStatus.WAITING)
     result = Column(Enum(GameResult), nullable=True)
-    board_state = Column(String(9), default="000000000")  # 0=empty, 1=player1, 2=player2
+    variant = Column(String(20), default="classic")
+    # classic: 9 chars, 0=empty, 1=player1, 2=player2 / other variants: "<player1 hex>:<player2 hex>" bitmasks
+    board_state = Column(String(128), default="000000000")
     current_turn = Column(Integer, default=1)  # 1 or 2
     total_moves = Column(Integer, default=0)
     started_at = Column(DateTime(timezone=True), nullable=True)
@@ -82,4 +95,18 @@ class Game(Base):
     room = relationship("Room", back_populates="game")
     player1 = relationship("Player", foreign_keys=[player1_id], back_populates="games_as_player1")
     player2 = relationship("Player", foreign_keys=[player2_id], back_populates="games_as_player2")
-    winner = relationship("Player", foreign_keys=[winner_id])
\ No newline at end of file
+    winner = relationship("Player", foreign_keys=[winner_id])
+
+class Move(Base):
+    __tablename__ = "moves"
+    __table_args__ = (
+        # One row per ply; also serves replay in move order
+        UniqueConstraint("game_id", "ply", name="uq_moves_game_ply"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
+    ply = Column(Integer, nullable=False)  # 1-based move number within the game
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
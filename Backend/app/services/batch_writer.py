@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, List, Optional, Tuple, Type
+
+from app.core.config import settings
+from app.services.metrics import BATCH_ROWS_DROPPED, ERRORS
+
+
+class BatchWriter:
+    """
+    Buffers rows in memory and writes them in batches, whenever max_batch rows
+    are pending or every flush_interval seconds, whichever comes first.
+    Subclasses implement _write.
+
+    A failed batch is kept for the next flush, but only max_attempts times
+    in a row; after that it is dropped so one bad batch can't stall the
+    writer forever. Errors in permanent_errors (rows that can never be
+    written) make the batch be retried row by row and the bad rows dropped
+    at once. No more than max_pending rows are buffered; beyond that the
+    oldest are dropped.
+    """
+
+    name = "batch writer"
+    permanent_errors: Tuple[Type[Exception], ...] = ()
+
+    def __init__(self, max_batch: int, flush_interval: float,
+                 max_attempts: int = settings.BATCH_WRITER_MAX_ATTEMPTS,
+                 max_pending: int = settings.BATCH_WRITER_MAX_PENDING):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self._failures = 0  # Failed flushes in a row
+        self._buffer: List[Any] = []
+        self._lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def add(self, item: Any) -> None:
+        self._buffer.append(item)
+        self._trim()
+        if len(self._buffer) >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write everything pending; returns the number of rows written"""
+        async with self._lock:
+            if not self._buffer:
+                return 0
+            items, self._buffer = self._buffer, []
+            try:
+                await self._write(items)
+            except self.permanent_errors:
+                return await self._write_each(items)
+            except Exception:
+                self._failures += 1
+                if self._failures >= self.max_attempts:
+                    self._failures = 0
+                    self._drop(items, 'failed')
+                else:
+                    # Keep the rows (in order) for the next attempt
+                    self._buffer[:0] = items
+                    self._trim()
+                raise
+            self._failures = 0
+            return len(items)
+
+    async def _write_each(self, items: List[Any]) -> int:
+        """Write rows one at a time, dropping those that can never be written"""
+        written = 0
+        for index, item in enumerate(items):
+            try:
+                await self._write([item])
+            except self.permanent_errors as e:
+                print(f"Dropping a {self.name} row: {str(e)}")
+                self._drop([item], 'rejected')
+            except Exception:
+                self._buffer[:0] = items[index:]
+                self._trim()
+                raise
+            else:
+                written += 1
+        self._failures = 0
+        return written
+
+    def _trim(self) -> None:
+        excess = len(self._buffer) - self.max_pending
+        if excess > 0:
+            self._drop(self._buffer[:excess], 'overflow')
+            del self._buffer[:excess]
+
+    def _drop(self, items: List[Any], reason: str) -> None:
+        BATCH_ROWS_DROPPED.labels(self.name, reason).inc(len(items))
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background loop and drain what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing {self.name}: {str(e)}")
+                ERRORS.labels(self.name).inc()
+
+    async def _write(self, items: List[Any]) -> None:
+        raise NotImplementedError
@@ -0,0 +1,125 @@
+from array import array
+from typing import Optional, Tuple
+
+# Cell i of the board is bit i of a 9-bit mask:
+#   0 | 1 | 2
+#   3 | 4 | 5
+#   6 | 7 | 8
+FULL_MASK = 0b111111111
+
+WIN_LINES = (
+    0b000000111,  # Top row
+    0b000111000,  # Middle row
+    0b111000000,  # Bottom row
+    0b001001001,  # Left column
+    0b010010010,  # Middle column
+    0b100100100,  # Right column
+    0b100010001,  # Diagonal \
+    0b001010100,  # Diagonal /
+)
+
+# Precomputed once for all 512 masks:
+#   WIN_TABLE[mask]       -> 1 if the mask contains a winning line
+#   EMPTY_CELLS[occupied] -> tuple of free positions
+#   _DIGITS[mask]         -> the mask as a 9-digit decimal (cell 0 first), used for serialization
+WIN_TABLE = bytes(
+    1 if any(mask & line == line for line in WIN_LINES) else 0
+    for mask in range(FULL_MASK + 1)
+)
+EMPTY_CELLS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(i for i in range(9) if not (occupied >> i) & 1)
+    for occupied in range(FULL_MASK + 1)
+)
+_DIGITS = tuple(
+    sum(10 ** (8 - i) for i in range(9) if (mask >> i) & 1)
+    for mask in range(FULL_MASK + 1)
+)
+
+
+# The "000000000" column format read as a base-3 number (cell 0 most significant)
+# indexes the per-player masks of every one of the 3^9 boards
+def _base3_masks(player: int) -> array:
+    masks = array('H', bytes(2 * 3 ** 9))
+    for value in range(3 ** 9):
+        mask, digits = 0, value
+        for i in range(8, -1, -1):
+            if digits % 3 == player:
+                mask |= 1 << i
+            digits //= 3
+        masks[value] = mask
+    return masks
+
+
+_BASE3_PLAYER1 = _base3_masks(1)
+_BASE3_PLAYER2 = _base3_masks(2)
+
+
+class Board:
+    """Tic-tac-toe board stored as two 9-bit masks, one per player"""
+
+    __slots__ = ('player1', 'player2')
+
+    size = 9
+
+    def __init__(self, player1: int = 0, player2: int = 0):
+        self.player1 = player1
+        self.player2 = player2
+
+    @classmethod
+    def from_string(cls, board_state: str) -> "Board":
+        """Build a board from the "000000000" column format"""
+        value = int(board_state, 3)
+        return cls(_BASE3_PLAYER1[value], _BASE3_PLAYER2[value])
+
+    def to_string(self) -> str:
+        """Convert the board to the "000000000" column format"""
+        return str(_DIGITS[self.player1] + 2 * _DIGITS[self.player2]).zfill(9)
+
+    def copy(self) -> "Board":
+        return Board(self.player1, self.player2)
+
+    @property
+    def occupied(self) -> int:
+        return self.player1 | self.player2
+
+    def is_valid_move(self, position: int) -> bool:
+        return 0 <= position <= 8 and not ((self.player1 | self.player2) >> position) & 1
+
+    def available_moves(self) -> Tuple[int, ...]:
+        return EMPTY_CELLS[self.player1 | self.player2]
+
+    def place(self, position: int, player: int) -> None:
+        """Mark a position for player 1 or 2 (validity is checked by the caller)"""
+        if player == 1:
+            self.player1 |= 1 << position
+        else:
+            self.player2 |= 1 << position
+
+    def winner(self) -> Optional[int]:
+        """
+        Returns:
+            1 if player 1 wins
+            2 if player 2 wins
+            0 if draw
+            None if game continues
+        """
+        if WIN_TABLE[self.player1]:
+            return 1
+        if WIN_TABLE[self.player2]:
+            return 2
+        if self.player1 | self.player2 == FULL_MASK:
+            return 0
+        return None
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, Board)
+            and self.player1 == other.player1
+            and self.player2 == other.player2
+        )
+
+    def __hash__(self) -> int:
+        return self.player1 | (self.player2 << 9)
+
+    def __repr__(self) -> str:
+        return f"Board({self.to_string()!r})"
@@ -0,0 +1,141 @@
+from typing import Dict, Optional, Tuple, Union
+
+from app.services.bitboard import Board
+
+# Line directions checked through the last stone: row, column, both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class Variant:
+    """Board size and number in a row needed to win"""
+
+    def __init__(self, name: str, width: int, height: int, win_length: int):
+        if win_length > max(width, height):
+            raise ValueError("win_length does not fit on the board")
+        self.name = name
+        self.width = width
+        self.height = height
+        self.win_length = win_length
+
+    @property
+    def size(self) -> int:
+        return self.width * self.height
+
+
+VARIANTS: Dict[str, Variant] = {
+    "classic": Variant("classic", 3, 3, 3),
+    "five": Variant("five", 5, 5, 4),
+    "gomoku": Variant("gomoku", 15, 15, 5),
+}
+
+DEFAULT_VARIANT = "classic"
+
+
+class MNKBoard:
+    """
+    Board of any width x height where win_length in a row wins.
+    Each player is one arbitrary-size int bitmask (cell = row * width + col);
+    the winner is found incrementally from the last stone placed, O(win_length).
+    Stored as "<player1 hex>:<player2 hex>".
+    """
+
+    __slots__ = ('variant', 'size', 'player1', 'player2', 'moves', '_winner')
+
+    def __init__(self, variant: Variant, player1: int = 0, player2: int = 0):
+        self.variant = variant
+        self.size = variant.size
+        self.player1 = player1
+        self.player2 = player2
+        self.moves = bin(player1).count('1') + bin(player2).count('1')
+        self._winner = self._find_winner()
+
+    @classmethod
+    def from_string(cls, variant: Variant, board_state: str) -> "MNKBoard":
+        player1, player2 = board_state.split(':')
+        return cls(variant, int(player1, 16), int(player2, 16))
+
+    def to_string(self) -> str:
+        return f"{self.player1:x}:{self.player2:x}"
+
+    def copy(self) -> "MNKBoard":
+        board = MNKBoard.__new__(MNKBoard)
+        board.variant = self.variant
+        board.size = self.size
+        board.player1 = self.player1
+        board.player2 = self.player2
+        board.moves = self.moves
+        board._winner = self._winner
+        return board
+
+    def is_valid_move(self, position: int) -> bool:
+        return 0 <= position < self.size and not ((self.player1 | self.player2) >> position) & 1
+
+    def available_moves(self) -> Tuple[int, ...]:
+        occupied = self.player1 | self.player2
+        return tuple(i for i in range(self.size) if not (occupied >> i) & 1)
+
+    def place(self, position: int, player: int) -> None:
+        """Mark a position for player 1 or 2 and update the winner (validity is checked by the caller)"""
+        if player == 1:
+            self.player1 |= 1 << position
+        else:
+            self.player2 |= 1 << position
+        self.moves += 1
+
+        if self._winner is None:
+            if self._line_through(position, self.player1 if player == 1 else self.player2):
+                self._winner = player
+            elif self.moves == self.size:
+                self._winner = 0
+
+    def winner(self) -> Optional[int]:
+        """1 or 2 for the winning player, 0 for a draw, None if the game continues"""
+        return self._winner
+
+    def _line_through(self, position: int, mask: int) -> bool:
+        """True if `mask` has win_length in a row through `position`"""
+        width, height, need = self.variant.width, self.variant.height, self.variant.win_length
+        row, col = divmod(position, width)
+
+        for d_row, d_col in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = row + sign * d_row, col + sign * d_col
+                while 0 <= r < height and 0 <= c < width and (mask >> (r * width + c)) & 1:
+                    count += 1
+                    if count >= need:
+                        return True
+                    r, c = r + sign * d_row, c + sign * d_col
+        return False
+
+    def _find_winner(self) -> Optional[int]:
+        """Full scan, only used when loading a stored board"""
+        for player, mask in ((1, self.player1), (2, self.player2)):
+            for position in range(self.size):
+                if (mask >> position) & 1 and self._line_through(position, mask):
+                    return player
+        return 0 if self.moves == self.size else None
+
+
+GameBoard = Union[Board, MNKBoard]
+
+
+def get_variant(name: Optional[str]) -> Variant:
+    """Raises ValueError for unknown variants"""
+    variant = VARIANTS.get(name or DEFAULT_VARIANT)
+    if variant is None:
+        raise ValueError(f"Unknown variant: {name}")
+    return variant
+
+
+def create_board(variant_name: Optional[str] = None, board_state: Optional[str] = None) -> GameBoard:
+    """
+    Board for a variant. Classic 3x3 games use the precomputed bitboard and keep
+    the "000000000" column format; every other variant uses MNKBoard.
+    """
+    variant = get_variant(variant_name)
+    if variant.name == DEFAULT_VARIANT:
+        return Board.from_string(board_state) if board_state else Board()
+    if board_state:
+        return MNKBoard.from_string(variant, board_state)
+    return MNKBoard(variant)
@@ -0,0 +1,105 @@
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List
+
+from app.core.config import settings
+
+
+class ChatError(ValueError):
+    """Raised when a chat message is rejected"""
+
+
+class TokenBucket:
+    """Allows `burst` messages at once, refilled at `rate` messages per second"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ChatRooms:
+    """
+    Rate limits and recent history of room chat on this worker.
+
+    Every sid and every room has a token bucket, so neither one client nor a
+    whole room can make the server fan out more than its rate. Each room keeps
+    its last history_size messages in a ring buffer for players who join
+    later; the buffer and the room's bucket are dropped by close_room().
+    """
+
+    def __init__(
+        self,
+        max_length: int = settings.CHAT_MAX_LENGTH,
+        history_size: int = settings.CHAT_HISTORY_SIZE,
+        sid_rate: float = settings.CHAT_SID_RATE,
+        sid_burst: float = settings.CHAT_SID_BURST,
+        room_rate: float = settings.CHAT_ROOM_RATE,
+        room_burst: float = settings.CHAT_ROOM_BURST,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_length = max_length
+        self.history_size = history_size
+        self.sid_rate, self.sid_burst = sid_rate, sid_burst
+        self.room_rate, self.room_burst = room_rate, room_burst
+        self._clock = clock
+        self._sid_buckets: Dict[str, TokenBucket] = {}
+        self._room_buckets: Dict[str, TokenBucket] = {}
+        self._history: Dict[str, Deque[dict]] = {}  # room_code -> recent messages, oldest first
+
+    def __len__(self) -> int:
+        return len(self._history)
+
+    def post(self, sid: str, room_code: str, username: str, message) -> dict:
+        """Check a message against the limits and record it; returns the message to broadcast"""
+        if not isinstance(message, str):
+            raise ChatError("Messages must be text")
+        if len(message) > self.max_length:
+            raise ChatError(f"Messages are limited to {self.max_length} characters")
+
+        now = self._clock()
+        sid_bucket = self._sid_buckets.get(sid)
+        if sid_bucket is None:
+            sid_bucket = self._sid_buckets[sid] = TokenBucket(self.sid_rate, self.sid_burst, now)
+        if not sid_bucket.take(now):
+            raise ChatError("You are sending messages too fast")
+
+        room_bucket = self._room_buckets.get(room_code)
+        if room_bucket is None:
+            room_bucket = self._room_buckets[room_code] = TokenBucket(self.room_rate, self.room_burst, now)
+        if not room_bucket.take(now):
+            raise ChatError("This room is sending messages too fast")
+
+        entry = {
+            'username': username,
+            'message': message,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        history = self._history.get(room_code)
+        if history is None:
+            history = self._history[room_code] = deque(maxlen=self.history_size)
+        history.append(entry)
+        return entry
+
+    def history(self, room_code: str) -> List[dict]:
+        return list(self._history.get(room_code, ()))
+
+    def forget_sid(self, sid: str) -> None:
+        self._sid_buckets.pop(sid, None)
+
+    def close_room(self, room_code: str) -> None:
+        """Release the history and rate limit of a finished or empty room"""
+        self._history.pop(room_code, None)
+        self._room_buckets.pop(room_code, None)
@@ -1,6 +1,10 @@
-from sqlalchemy.orm import Session
-from typing import Optional
-from app.models.player import Game, Player
+from typing import List, Optional
+from app.core.config import settings
+from app.models.player import Game
+from app.services.bitboard import Board
+from app.services.leaderboard import leaderboard
+from app.services.player_stats import player_stats
+from app.services.rating import rating_changes
 
 class GameService:
     """Service for game logic and operations"""
@@ -14,57 +18,35 @@ class GameService:
             0 if draw
             None if game continues
         """
-        # Convert board string to list for easier access
-        b = list(board)
+        return Board.from_string(board).winner()
 
-        # Winning combinations
-        winning_combos = [
-            [0, 1, 2],  # Top row
-            [3, 4, 5],  # Middle row
-            [6, 7, 8],  # Bottom row
-            [0, 3, 6],  # Left column
-            [1, 4, 7],  # Middle column
-            [2, 5, 8],  # Right column
-            [0, 4, 8],  # Diagonal \
-            [2, 4, 6],  # Diagonal /
-        ]
-
-        # Check for winner
-        for combo in winning_combos:
-            if b[combo[0]] == b[combo[1]] == b[combo[2]] != '0':
-                return int(b[combo[0]])
-
-        # Check for draw (no empty spaces)
-        if '0' not in b:
-            return 0
-
-        # Game continues
-        return None
-
-    def update_player_stats(self, db: Session, game: Game) -> None:
-        """Update player statistics after game ends"""
-        player1 = db.query(Player).get(game.player1_id)
-        player2 = db.query(Player).get(game.player2_id)
-
-        if not player1 or not player2:
-            return
-
-        # Update total games
-        player1.total_games += 1
-        player2.total_games += 1
-
-        # Update wins/losses/draws
-        if game.winner_id == player1.id:
-            player1.wins += 1
-            player2.losses += 1
-        elif game.winner_id == player2.id:
-            player2.wins += 1
-            player1.losses += 1
+    def update_player_stats(self, game: Game) -> List[dict]:
+        """
+        Queue the stat changes of a finished game; returns the deltas.
+        The players table is updated in the background by player_stats.
+        """
+        if game.winner_id == game.player1_id:
+            winner, outcomes = 1, ({'wins': 1}, {'losses': 1})
+        elif game.winner_id == game.player2_id:
+            winner, outcomes = 2, ({'losses': 1}, {'wins': 1})
         else:  # Draw
-            player1.draws += 1
-            player2.draws += 1
+            winner, outcomes = None, ({'draws': 1}, {'draws': 1})
+
+        # Elo from the current in-memory ratings; applied as increments like the counters
+        player_ids = (game.player1_id, game.player2_id)
+        ratings = [
+            entry.rating if entry is not None else settings.RATING_INITIAL
+            for entry in map(leaderboard.get, player_ids)
+        ]
+        rating_deltas = rating_changes(ratings[0], ratings[1], winner)
 
-        db.commit()
+        deltas = []
+        for player_id, outcome, rating in zip(player_ids, outcomes, rating_deltas):
+            delta = player_stats.record(player_id, total_games=1, rating=rating, **outcome)
+            # Leaderboards reflect the result right away
+            leaderboard.apply_delta(**delta)
+            deltas.append(delta)
+        return deltas
 
     def get_board_display(self, board_state: str) -> list:
         """Convert board string to display format"""
@@ -77,10 +59,8 @@ class GameService:
 
     def is_valid_move(self, board: str, position: int) -> bool:
         """Check if a move is valid"""
-        if not (0 <= position <= 8):
-            return False
-        return board[position] == '0'
+        return Board.from_string(board).is_valid_move(position)
 
     def get_available_moves(self, board: str) -> list:
         """Get list of available positions"""
-        return [i for i, cell in enumerate(board) if cell == '0']
\ No newline at end of file
+        return list(Board.from_string(board).available_moves())
\ No newline at end of file
@@ -0,0 +1,182 @@
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.player import Player
+
+# Players need this many games to appear in best_win_rate
+MIN_GAMES_FOR_WIN_RATE = 10
+
+# Player columns a LeaderboardEntry is built from, in its argument order
+ENTRY_COLUMNS = (
+    Player.id, Player.username, Player.display_name,
+    Player.total_games, Player.wins, Player.losses, Player.draws, Player.rating
+)
+
+
+class LeaderboardEntry:
+    """Snapshot of the player columns the leaderboards are built from"""
+
+    __slots__ = ('player_id', 'username', 'display_name', 'total_games', 'wins', 'losses', 'draws', 'rating')
+
+    def __init__(self, player_id: int, username: str, display_name: str,
+                 total_games: int = 0, wins: int = 0, losses: int = 0, draws: int = 0,
+                 rating: Optional[float] = None):
+        self.player_id = player_id
+        self.username = username
+        self.display_name = display_name
+        self.total_games = total_games or 0
+        self.wins = wins or 0
+        self.losses = losses or 0
+        self.draws = draws or 0
+        self.rating = settings.RATING_INITIAL if rating is None else rating
+
+    @property
+    def win_rate(self):
+        if self.total_games == 0:
+            return 0.0
+        return round((self.wins / self.total_games) * 100, 2)
+
+    @property
+    def rank_score(self):
+        """Calculate rank score: wins * 3 + draws * 1"""
+        return self.wins * 3 + self.draws
+
+
+# Sort keys are ascending tuples (values negated for "highest first") ending in
+# player_id, so every key is unique and ties break the same way on every read.
+# A key of None leaves the player out of that category.
+CATEGORIES: Dict[str, Callable[[LeaderboardEntry], Optional[Tuple]]] = {
+    # /api/stats/ranking order
+    'ranking': lambda e: (-e.wins, -e.total_games, e.player_id),
+    'most_wins': lambda e: (-e.wins, e.player_id),
+    'best_win_rate': lambda e: (
+        (-e.wins / e.total_games, e.player_id)
+        if e.total_games >= MIN_GAMES_FOR_WIN_RATE else None
+    ),
+    'most_active': lambda e: (-e.total_games, e.player_id),
+    'rank_score': lambda e: (-e.rank_score, e.player_id),
+    'rating': lambda e: (-e.rating, e.player_id),
+}
+
+
+class Leaderboard:
+    """
+    In-memory leaderboards kept sorted per category.
+    Updated incrementally when player stats change, so reads never touch the DB.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._entries: Dict[int, LeaderboardEntry] = {}
+        self._keys: Dict[str, Dict[int, Tuple]] = {name: {} for name in CATEGORIES}
+        self._sorted: Dict[str, List[Tuple]] = {name: [] for name in CATEGORIES}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Load every player in a single pass"""
+        result = await db.execute(select(*ENTRY_COLUMNS))
+        entries = [LeaderboardEntry(*row) for row in result]
+
+        self._entries = {entry.player_id: entry for entry in entries}
+        for name, key_func in CATEGORIES.items():
+            keys = {}
+            for entry in entries:
+                key = key_func(entry)
+                if key is not None:
+                    keys[entry.player_id] = key
+            self._keys[name] = keys
+            self._sorted[name] = sorted(keys.values())
+        self.loaded = True
+
+    async def load_missing(self, db: AsyncSession, player_ids: Iterable[int]) -> None:
+        """
+        Load players this worker has no entry for (created on another worker
+        since the last rebuild), in one query; none when all are known.
+        """
+        missing = {player_id for player_id in player_ids if player_id is not None} - self._entries.keys()
+        if not missing:
+            return
+        for row in await db.execute(select(*ENTRY_COLUMNS).where(Player.id.in_(missing))):
+            entry = LeaderboardEntry(*row)
+            self._entries.setdefault(entry.player_id, entry)
+            self._reindex(self._entries[entry.player_id])
+
+    def update_player(self, player: Player) -> None:
+        """Insert or refresh a player after its row changed"""
+        entry = self._entries.get(player.id)
+        if entry is None:
+            entry = LeaderboardEntry(player.id, player.username, player.display_name)
+            self._entries[player.id] = entry
+
+        entry.username = player.username
+        entry.display_name = player.display_name
+        entry.total_games = player.total_games or 0
+        entry.wins = player.wins or 0
+        entry.losses = player.losses or 0
+        entry.draws = player.draws or 0
+        if player.rating is not None:
+            entry.rating = player.rating
+        self._reindex(entry)
+
+    def apply_delta(self, player_id: int, total_games: int = 0, wins: int = 0,
+                    losses: int = 0, draws: int = 0, rating: float = 0.0) -> None:
+        """Add stat increments to a player ahead of the DB write"""
+        entry = self._entries.get(player_id)
+        if entry is None:
+            # Not loaded here; see apply_remote_delta
+            return
+
+        entry.total_games += total_games
+        entry.wins += wins
+        entry.losses += losses
+        entry.draws += draws
+        entry.rating += rating
+        self._reindex(entry)
+
+    def row(self, player_id: int) -> Optional[dict]:
+        """A player's entry as a dict, sent to workers that may not have loaded the player"""
+        entry = self._entries.get(player_id)
+        return {name: getattr(entry, name) for name in LeaderboardEntry.__slots__} if entry is not None else None
+
+    def apply_remote_delta(self, delta: dict, row: Optional[dict]) -> None:
+        """
+        A stat change made on another worker. row is the player's entry there,
+        delta included: it becomes this worker's entry when the player (created
+        on that worker) is not loaded here yet.
+        """
+        if delta['player_id'] in self._entries or row is None:
+            self.apply_delta(**delta)
+            return
+        entry = LeaderboardEntry(**row)
+        self._entries[entry.player_id] = entry
+        self._reindex(entry)
+
+    def get(self, player_id: int) -> Optional[LeaderboardEntry]:
+        return self._entries.get(player_id)
+
+    def top(self, category: str, limit: int) -> List[LeaderboardEntry]:
+        """Best `limit` players of a category, O(limit)"""
+        return [self._entries[key[-1]] for key in self._sorted[category][:max(limit, 0)]]
+
+    def _reindex(self, entry: LeaderboardEntry) -> None:
+        for name, key_func in CATEGORIES.items():
+            keys = self._keys[name]
+            ordered = self._sorted[name]
+
+            old_key = keys.pop(entry.player_id, None)
+            if old_key is not None:
+                del ordered[bisect_left(ordered, old_key)]
+
+            new_key = key_func(entry)
+            if new_key is not None:
+                keys[entry.player_id] = new_key
+                insort(ordered, new_key)
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,192 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.models.player import Game
+from app.services.board_engine import DEFAULT_VARIANT, create_board
+
+
+class MoveError(ValueError):
+    """Raised when a move is rejected by the live game state"""
+
+
+class LiveGame:
+    """Authoritative in-memory state of an in-progress game"""
+
+    def __init__(
+        self,
+        game_id: int,
+        room_id: int,
+        room_code: str,
+        player1_id: int,
+        player2_id: int,
+        board_state: Optional[str] = None,
+        current_turn: int = 1,
+        total_moves: int = 0,
+        bot_player_id: Optional[int] = None,
+        bot_mistake_rate: float = 0.0,
+        variant: str = DEFAULT_VARIANT
+    ):
+        self.game_id = game_id
+        self.room_id = room_id
+        self.room_code = room_code
+        self.player1_id = player1_id
+        self.player2_id = player2_id
+        self.variant = variant
+        self.board = create_board(variant, board_state)
+        self.current_turn = current_turn
+        self.total_moves = total_moves
+        self.persisted_moves = total_moves  # Moves already written to the DB
+        self.bot_player_id = bot_player_id  # Set when player2 is the solver bot
+        self.bot_mistake_rate = bot_mistake_rate
+        self.last_move_at = time.monotonic()  # Loading counts as activity
+
+    @classmethod
+    def from_model(cls, game: Game, room_code: str, **kwargs) -> "LiveGame":
+        return cls(
+            game_id=game.id,
+            room_id=game.room_id,
+            room_code=room_code,
+            player1_id=game.player1_id,
+            player2_id=game.player2_id,
+            board_state=game.board_state,
+            current_turn=game.current_turn,
+            total_moves=game.total_moves,
+            variant=game.variant or DEFAULT_VARIANT,
+            **kwargs
+        )
+
+    @property
+    def board_state(self) -> str:
+        return self.board.to_string()
+
+    @property
+    def current_player_id(self) -> int:
+        return self.player1_id if self.current_turn == 1 else self.player2_id
+
+    @property
+    def bot_to_move(self) -> bool:
+        return self.bot_player_id is not None and self.current_player_id == self.bot_player_id
+
+    def is_idle(self, timeout: float) -> bool:
+        """No move in the last `timeout` seconds"""
+        return time.monotonic() - self.last_move_at > timeout
+
+    def player_number(self, player_id: int) -> Optional[int]:
+        if player_id == self.player1_id:
+            return 1
+        if player_id == self.player2_id:
+            return 2
+        return None
+
+    def apply_move(self, player_id: int, position: int) -> Optional[int]:
+        """
+        Validate and apply a move.
+        Returns 1/2 for the winning player, 0 for a draw, None if game continues.
+        Raises MoveError if the move is not allowed.
+        """
+        if not isinstance(position, int) or not (0 <= position < self.board.size):
+            raise MoveError("Invalid position")
+
+        if self.current_player_id != player_id:
+            raise MoveError("Not your turn")
+
+        if not self.board.is_valid_move(position):
+            raise MoveError("Position already taken")
+
+        self.board.place(position, self.current_turn)
+        self.total_moves += 1
+        self.last_move_at = time.monotonic()
+
+        winner = self.board.winner()
+        if winner is None:
+            # Switch turn
+            self.current_turn = 2 if self.current_turn == 1 else 1
+
+        return winner
+
+
+class LiveGameRegistry:
+    """Registry of in-progress games kept in memory for the move hot path"""
+
+    def __init__(self, checkpoint_interval: int = 0):
+        # Persist the board every N moves (0 disables checkpoints)
+        self.checkpoint_interval = checkpoint_interval
+        self._games: Dict[int, LiveGame] = {}
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __contains__(self, game_id: int) -> bool:
+        return game_id in self._games
+
+    def get(self, game_id: int) -> Optional[LiveGame]:
+        return self._games.get(game_id)
+
+    def add(self, game: LiveGame) -> LiveGame:
+        self._games[game.game_id] = game
+        return game
+
+    def remove(self, game_id: int) -> Optional[LiveGame]:
+        return self._games.pop(game_id, None)
+
+    def idle(self, timeout: float) -> List[LiveGame]:
+        """Games without a move in the last `timeout` seconds"""
+        return [game for game in self._games.values() if game.is_idle(timeout)]
+
+    def checkpoint_due(self, game: LiveGame) -> bool:
+        if not self.checkpoint_interval:
+            return False
+        return game.total_moves - game.persisted_moves >= self.checkpoint_interval
+
+
+class _GameLock:
+    __slots__ = ('lock', 'users')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0  # Coroutines holding or waiting for the lock
+
+
+class GameLocks:
+    """
+    Per-game asyncio locks that serialize the moves of one game on this worker
+    without blocking other games.
+
+    The table is bounded: past max_size entries, the least recently used
+    locks nobody holds or waits for are dropped (a dropped lock is simply
+    recreated on the next move of its game).
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._locks: "OrderedDict[int, _GameLock]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, game_id: int) -> AsyncIterator[None]:
+        entry = self._locks.get(game_id)
+        if entry is None:
+            self._evict(len(self._locks) + 1 - self.max_size)
+            entry = self._locks[game_id] = _GameLock()
+        else:
+            self._locks.move_to_end(game_id)
+
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+
+    def _evict(self, count: int) -> None:
+        if count <= 0:
+            return
+        idle = itertools.islice((game_id for game_id, entry in self._locks.items() if not entry.users), count)
+        for game_id in list(idle):
+            del self._locks[game_id]
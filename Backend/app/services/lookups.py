@@ -0,0 +1,83 @@
+from typing import NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.session import engine
+from app.models.player import Player, Room
+from app.services.cache import MISSING, TTLCache
+from app.services.leaderboard import leaderboard
+
+
+class ReservedUsernameError(ValueError):
+    """Raised when a client tries to use a username kept for the server (the bot)"""
+
+
+def is_reserved_username(username: str) -> bool:
+    return username.strip().casefold() == settings.BOT_USERNAME.casefold()
+
+
+class PlayerRef(NamedTuple):
+    id: int
+    username: str
+
+
+class RoomRef(NamedTuple):
+    """The columns of a room that never change after it is created"""
+    id: int
+    code: str
+    variant: str
+
+
+# Only columns that never change are cached, so entries can't go stale.
+# Missing rooms are not cached: another worker may create the room any time
+player_cache = TTLCache(ttl=settings.LOOKUP_CACHE_TTL_SECONDS, maxsize=settings.LOOKUP_CACHE_SIZE)
+room_cache = TTLCache(ttl=settings.LOOKUP_CACHE_TTL_SECONDS, maxsize=settings.LOOKUP_CACHE_SIZE)
+
+
+def upsert_player_statement(username: str):
+    """
+    INSERT ... ON CONFLICT (username) DO UPDATE ... RETURNING the player:
+    creates the player or touches last_seen in one statement, so concurrent
+    joins with the same new username can't both try to insert it.
+    """
+    dialect_insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(Player).values(username=username, display_name=username)
+    return statement.on_conflict_do_update(
+        index_elements=[Player.username],
+        set_={'last_seen': func.now()}
+    ).returning(Player)
+
+
+async def get_or_create_player(db: AsyncSession, username: str) -> PlayerRef:
+    """The player with this username, created if needed (no query when cached)"""
+    if is_reserved_username(username):
+        raise ReservedUsernameError("This username is reserved")
+
+    async def load() -> PlayerRef:
+        player = await db.scalar(upsert_player_statement(username))
+        await db.commit()
+        if leaderboard.get(player.id) is None:
+            leaderboard.update_player(player)
+        return PlayerRef(player.id, player.username)
+
+    return await player_cache.get_or_load(username, load)
+
+
+async def find_room(db: AsyncSession, code: str) -> Optional[RoomRef]:
+    """The room with this code, or None (no query when cached)"""
+    room = room_cache.get(code)
+    if room is MISSING:
+        row = (await db.execute(select(Room.id, Room.code, Room.variant).where(Room.code == code))).first()
+        if row is None:
+            return None
+        room = RoomRef(*row)
+        room_cache.set(code, room)
+    return room
+
+
+def cache_room(room: Room) -> None:
+    """Write-through for a room that was just created"""
+    room_cache.set(room.code, RoomRef(room.id, room.code, room.variant))
@@ -0,0 +1,142 @@
+import asyncio
+import itertools
+import time
+from bisect import bisect_left, insort
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.leaderboard import leaderboard
+from app.services.metrics import ERRORS
+
+Match = Tuple["QueueEntry", "QueueEntry"]
+
+
+class QueueEntry:
+    """A player waiting for an opponent"""
+
+    __slots__ = ('sid', 'player_id', 'username', 'rating', 'variant', 'joined_at', 'key')
+
+    def __init__(self, sid: str, player_id: int, username: str, rating: float, variant: str, joined_at: float):
+        self.sid = sid
+        self.player_id = player_id
+        self.username = username
+        self.rating = rating
+        self.variant = variant
+        self.joined_at = joined_at
+        self.key: Tuple = ()
+
+
+def player_rating(player_id: int) -> float:
+    """Matchmaking rating from the in-memory leaderboard (MATCHMAKING_RATING attribute)"""
+    entry = leaderboard.get(player_id)
+    return getattr(entry, settings.MATCHMAKING_RATING) if entry is not None else 0
+
+
+class MatchmakingQueue:
+    """
+    Players waiting for a game, kept sorted by rating per variant.
+
+    A pairing pass walks each sorted list once and pairs neighbours whose
+    rating gap fits the search window of the player who has waited longer;
+    the window starts at base_window and widens by window_growth per second
+    up to max_window. A pass is O(n), joins and leaves are O(log n) searches.
+    """
+
+    def __init__(self, base_window: float, window_growth: float, max_window: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.base_window = base_window
+        self.window_growth = window_growth
+        self.max_window = max_window
+        self._clock = clock
+        self._entries: Dict[str, QueueEntry] = {}  # sid -> entry
+        self._sorted: Dict[str, List[Tuple]] = {}  # variant -> sorted (rating, seq, entry)
+        self._seq = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._entries
+
+    def add(self, sid: str, player_id: int, username: str, rating: float, variant: str) -> QueueEntry:
+        """Queue a player (re-queueing a sid replaces its previous entry)"""
+        self.remove(sid)
+        entry = QueueEntry(sid, player_id, username, rating, variant, self._clock())
+        # seq keeps equal ratings in arrival order and makes every key unique,
+        # so entries themselves are never compared
+        entry.key = (rating, next(self._seq), entry)
+        self._entries[sid] = entry
+        insort(self._sorted.setdefault(variant, []), entry.key)
+        return entry
+
+    def requeue(self, entry: QueueEntry) -> bool:
+        """Put back an entry taken out by pair(), keeping its place in the wait (no-op if its sid queued again)"""
+        if entry.sid in self._entries:
+            return False
+        entry.key = (entry.rating, next(self._seq), entry)
+        self._entries[entry.sid] = entry
+        insort(self._sorted.setdefault(entry.variant, []), entry.key)
+        return True
+
+    def remove(self, sid: str) -> Optional[QueueEntry]:
+        entry = self._entries.pop(sid, None)
+        if entry is not None:
+            ordered = self._sorted[entry.variant]
+            del ordered[bisect_left(ordered, entry.key)]
+        return entry
+
+    def pair(self, now: Optional[float] = None) -> List[Match]:
+        """Take every pair that can be matched right now out of the queue"""
+        now = self._clock() if now is None else now
+        base_window, window_growth, max_window = self.base_window, self.window_growth, self.max_window
+        matches: List[Match] = []
+
+        for variant, ordered in self._sorted.items():
+            remaining = []
+            waiting: Optional[QueueEntry] = None
+            for _, _, entry in ordered:
+                if waiting is not None and waiting.player_id != entry.player_id:
+                    gap = entry.rating - waiting.rating
+                    # The wider window is the one of whoever joined first
+                    if gap <= base_window or gap <= min(
+                        base_window + window_growth * (now - min(waiting.joined_at, entry.joined_at)),
+                        max_window
+                    ):
+                        matches.append((waiting, entry))
+                        waiting = None
+                        continue
+                if waiting is not None:
+                    remaining.append(waiting.key)
+                waiting = entry
+            if waiting is not None:
+                remaining.append(waiting.key)
+            self._sorted[variant] = remaining
+
+        for first, second in matches:
+            del self._entries[first.sid]
+            del self._entries[second.sid]
+        return matches
+
+    async def start(self, on_matches: Callable[[List[Match]], Awaitable[None]],
+                    interval: float = settings.MATCHMAKING_INTERVAL_SECONDS) -> None:
+        """Run a pairing pass every `interval` seconds"""
+        self._task = asyncio.create_task(self._run(on_matches, interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, on_matches: Callable[[List[Match]], Awaitable[None]], interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            matches = self.pair()
+            if not matches:
+                continue
+            try:
+                await on_matches(matches)
+            except Exception as e:
+                print(f"Error creating matches: {str(e)}")
+                ERRORS.labels('matchmaking').inc()
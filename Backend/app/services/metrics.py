@@ -0,0 +1,318 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds (Prometheus client defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+class _Metric:
+    """Base for metrics with optional labels; each label combination is a child series"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def labels(self, *values: str):
+        """Child series for these label values (created on first use)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(suffix, labels, value) for every series"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.value += amount
+
+    def samples(self):
+        for values, child in self._children.items():
+            yield '', _format_labels(self.labelnames, values), child.value
+
+
+class Gauge(_Metric):
+    """
+    Value read when the registry is rendered. A gauge with a callback costs
+    nothing on the hot path; the callback is only called by /metrics.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Optional[Callable[[], float]] = None,
+                 labelnames: Sequence[str] = ()):
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def set(self, value: float) -> None:
+        self._default.value = value
+
+    def samples(self):
+        if self.callback is not None:
+            yield '', '', self.callback()
+            return
+        for values, child in self._children.items():
+            yield '', _format_labels(self.labelnames, values), child.value
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets (rendered cumulatively, Prometheus style)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def samples(self):
+        for values, child in self._children.items():
+            names = self.labelnames + ('le',)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                yield '_bucket', _format_labels(names, values + (_format_value(bound),)), cumulative
+            labels = _format_labels(self.labelnames, values)
+            yield '_sum', labels, child.sum
+            yield '_count', labels, cumulative
+
+
+class MetricsRegistry:
+    """In-process metrics, rendered in the Prometheus text format for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, callback: Optional[Callable[[], float]] = None,
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, callback, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+SOCKETIO_EVENT_SECONDS = registry.histogram(
+    'socketio_event_duration_seconds', 'Time spent in Socket.IO event handlers', ['event']
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Time spent serving REST requests', ['method', 'route']
+)
+HTTP_REQUESTS = registry.counter(
+    'http_requests_total', 'REST requests served', ['method', 'route', 'status']
+)
+ERRORS = registry.counter(
+    'errors_total', 'Errors caught or raised by handlers and background tasks', ['source']
+)
+BATCH_ROWS_DROPPED = registry.counter(
+    'batch_writer_rows_dropped_total', 'Buffered rows a batch writer gave up on', ['writer', 'reason']
+)
+DB_STATEMENTS = registry.counter(
+    'db_statements_total', 'SQL statements sent to the database'
+)
+DB_STATEMENTS_PER_REQUEST = registry.histogram(
+    'db_statements_per_request', 'SQL statements per REST request or Socket.IO event', ['handler'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+BROADCAST_FRAMES = registry.counter(
+    'broadcast_frames_total', 'Frames sent by the room broadcaster'
+)
+BROADCAST_EVENTS = registry.counter(
+    'broadcast_events_total', 'Room events sent by the room broadcaster'
+)
+BROADCAST_DROPPED = registry.counter(
+    'broadcast_events_dropped_total', 'Room events shed because the room queue was full', ['event']
+)
+BROADCAST_SLOW_CLIENTS = registry.counter(
+    'broadcast_slow_clients_total', 'Clients disconnected because their send queue kept growing'
+)
+SPECTATOR_FRAMES = registry.counter(
+    'spectator_frames_total', 'Frames sent to spectators (one serialized payload per room flush)'
+)
+SPECTATOR_DELIVERIES = registry.counter(
+    'spectator_deliveries_total', 'Frames handed to spectator connections', ['kind']
+)
+REAPED = registry.counter(
+    'reaper_cleaned_total', 'Rooms, games and connections cleaned up by the reaper', ['kind']
+)
+
+# Statements counted for the request or event running in this context
+_statement_count: ContextVar[Optional[List[int]]] = ContextVar('statement_count', default=None)
+
+
+def count_statement(*args) -> None:
+    """before_cursor_execute listener"""
+    DB_STATEMENTS.inc()
+    count = _statement_count.get()
+    if count is not None:
+        count[0] += 1
+
+
+class track_statements:
+    """Count the statements run inside the block: `with track_statements() as count: ... count[0]`"""
+
+    __slots__ = ('count', '_token')
+
+    def __enter__(self) -> List[int]:
+        self.count = [0]
+        self._token = _statement_count.set(self.count)
+        return self.count
+
+    def __exit__(self, *exc) -> None:
+        _statement_count.reset(self._token)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and DB statements of each REST request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        with track_statements() as count:
+            try:
+                await self.app(scope, receive, send_with_status)
+            except Exception:
+                ERRORS.labels('http').inc()
+                raise
+            finally:
+                # Label by route template, not the raw path, to keep the series bounded
+                route = scope.get('route')
+                path = route.path_format if route is not None else 'unmatched'
+                method = scope['method']
+                HTTP_REQUEST_SECONDS.labels(method, path).observe(time.perf_counter() - start)
+                HTTP_REQUESTS.labels(method, path, str(status)).inc()
+                DB_STATEMENTS_PER_REQUEST.labels(f"http:{method} {path}").observe(count[0])
+
+
+def instrument_event(event: str):
+    """Decorator for Socket.IO event handlers: latency, DB statements and escaped errors"""
+    latency = SOCKETIO_EVENT_SECONDS.labels(event)
+    statements = DB_STATEMENTS_PER_REQUEST.labels(f"socketio:{event}")
+    errors = ERRORS.labels(f"socketio:{event}")
+
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            with track_statements() as count:
+                try:
+                    return await handler(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    latency.observe(time.perf_counter() - start)
+                    statements.observe(count[0])
+        return wrapper
+    return decorator
@@ -0,0 +1,52 @@
+from typing import Dict, List, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal, engine
+from app.models.player import Move
+from app.services.batch_writer import BatchWriter
+
+
+class MoveLogWriter(BatchWriter):
+    """
+    Append-only move log, written with multi-row INSERTs instead of a commit per move.
+
+    A game reloaded from its last checkpoint (after a restart or on another
+    worker) plays its moves again from that ply, so a ply may already be in
+    the log: the INSERT is an upsert on (game_id, ply) and the latest move
+    for a ply wins. Rows that still can't be written (e.g. their game is
+    gone) are dropped on their own instead of blocking the log.
+    """
+
+    name = "move log"
+    permanent_errors = (IntegrityError,)
+
+    def record(self, game_id: int, ply: int, player_id: int, position: int) -> None:
+        self.add({
+            'game_id': game_id,
+            'ply': ply,
+            'player_id': player_id,
+            'position': position
+        })
+
+    async def _write(self, items: List[dict]) -> None:
+        # One row per ply: an upsert can't touch the same row twice in a statement
+        rows: Dict[Tuple[int, int], dict] = {(item['game_id'], item['ply']): item for item in items}
+        dialect_insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+        statement = dialect_insert(Move)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Move.game_id, Move.ply],
+            set_={
+                'player_id': statement.excluded.player_id,
+                'position': statement.excluded.position,
+                'created_at': statement.excluded.created_at
+            }
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(statement, list(rows.values()))
+            await db.commit()
+
+
+move_log = MoveLogWriter(settings.MOVE_LOG_BATCH_SIZE, settings.MOVE_LOG_FLUSH_SECONDS)
@@ -0,0 +1,59 @@
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy import bindparam, update
+
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal
+from app.models.player import Player
+from app.services.batch_writer import BatchWriter
+
+STAT_COLUMNS = ('total_games', 'wins', 'losses', 'draws', 'rating')
+
+
+class PlayerStatsWriter(BatchWriter):
+    """
+    Write-behind buffer of player stat deltas.
+    Deltas are summed per player and written as atomic
+    `UPDATE players SET wins = wins + :wins, ...` statements, so there are
+    no reads and no lost updates when games finish concurrently.
+    """
+
+    name = "player stats"
+
+    def record(self, player_id: int, total_games: int = 0, wins: int = 0,
+               losses: int = 0, draws: int = 0, rating: float = 0.0) -> dict:
+        delta = {
+            'player_id': player_id,
+            'total_games': total_games,
+            'wins': wins,
+            'losses': losses,
+            'draws': draws,
+            'rating': rating
+        }
+        self.add(delta)
+        return delta
+
+    async def _write(self, items: List[dict]) -> None:
+        totals: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(STAT_COLUMNS, 0))
+        for delta in items:
+            player_totals = totals[delta['player_id']]
+            for column in STAT_COLUMNS:
+                player_totals[column] += delta[column]
+
+        table = Player.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam('b_id'))
+            .values({column: table.c[column] + bindparam(f'b_{column}') for column in STAT_COLUMNS})
+        )
+        params = [
+            {'b_id': player_id, **{f'b_{column}': value for column, value in player_totals.items()}}
+            for player_id, player_totals in totals.items()
+        ]
+        async with AsyncSessionLocal() as db:
+            await db.execute(statement, params)
+            await db.commit()
+
+
+player_stats = PlayerStatsWriter(settings.PLAYER_STATS_BATCH_SIZE, settings.PLAYER_STATS_FLUSH_SECONDS)
@@ -0,0 +1,77 @@
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal, engine
+from app.models.player import Game, GameStatus, Player
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """Chance of winning (a draw counts half) against the opponent"""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def rating_changes(rating1: float, rating2: float, winner: Optional[int],
+                   k_factor: float = settings.RATING_K_FACTOR) -> Tuple[float, float]:
+    """
+    Rating deltas of player1 and player2 after a game.
+    winner is 1 or 2, or None / 0 for a draw. The deltas always sum to zero.
+    """
+    score1 = 1.0 if winner == 1 else 0.0 if winner == 2 else 0.5
+    delta = k_factor * (score1 - expected_score(rating1, rating2))
+    return delta, -delta
+
+
+async def recompute_ratings(chunk_size: int = 1000) -> int:
+    """
+    Rebuild every Elo rating from the finished games in chronological order.
+    Games are streamed in chunks; only the ratings map is held in memory.
+    Returns the number of games replayed.
+
+    Run it offline (python -m app.services.rating): a running server keeps
+    applying its own incremental updates and has the old ratings loaded.
+    """
+    ratings: Dict[int, float] = {}
+    replayed = 0
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(Game.player1_id, Game.player2_id, Game.winner_id)
+            .where(Game.status == GameStatus.FINISHED, Game.player2_id.is_not(None))
+            .order_by(Game.finished_at, Game.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for games in result.partitions():
+            for player1_id, player2_id, winner_id in games:
+                rating1 = ratings.get(player1_id, settings.RATING_INITIAL)
+                rating2 = ratings.get(player2_id, settings.RATING_INITIAL)
+                winner = 1 if winner_id == player1_id else 2 if winner_id == player2_id else None
+                delta1, delta2 = rating_changes(rating1, rating2, winner)
+                ratings[player1_id] = rating1 + delta1
+                ratings[player2_id] = rating2 + delta2
+            replayed += len(games)
+
+    # Written once the stream is closed, so SQLite is not asked to write under an open read
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Player).values(rating=settings.RATING_INITIAL))
+
+        table = Player.__table__
+        statement = update(table).where(table.c.id == bindparam('b_id')).values(rating=bindparam('b_rating'))
+        rows = [{'b_id': player_id, 'b_rating': rating} for player_id, rating in ratings.items()]
+        for start in range(0, len(rows), chunk_size):
+            await db.execute(statement, rows[start:start + chunk_size])
+        await db.commit()
+
+    return replayed
+
+
+async def main():
+    games = await recompute_ratings()
+    print(f"✅ Ratings recomputed from {games} games")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
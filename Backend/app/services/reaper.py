@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import exists, select, update
+
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal
+from app.models.player import Game, GameResult, GameStatus, Move, Room
+from app.services.metrics import ERRORS
+
+
+async def expire_waiting_rooms(cutoff: datetime, batch_size: int,
+                               occupied: Callable[[str], Awaitable[bool]]) -> List[int]:
+    """
+    Finish WAITING rooms (and their waiting games) created before cutoff
+    that nobody is in. Works batch_size rooms per short transaction;
+    returns the ids of the rooms expired.
+    """
+    expired: List[int] = []
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            # Rows a live handler has locked are left for the next pass (ignored on SQLite)
+            rows = (await db.execute(
+                select(Room.id, Room.code)
+                .where(Room.status == GameStatus.WAITING, Room.created_at < cutoff, Room.id > last_id)
+                .order_by(Room.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            room_ids = [room_id for room_id, code in rows if not await occupied(code)]
+            if room_ids:
+                now = datetime.utcnow()
+                await db.execute(
+                    update(Room)
+                    .where(Room.id.in_(room_ids), Room.status == GameStatus.WAITING)
+                    .values(status=GameStatus.FINISHED, finished_at=now)
+                )
+                await db.execute(
+                    update(Game)
+                    .where(Game.room_id.in_(room_ids), Game.status == GameStatus.WAITING)
+                    .values(status=GameStatus.FINISHED, finished_at=now)
+                )
+            await db.commit()
+
+        expired.extend(room_ids)
+        if len(rows) < batch_size:
+            break
+        # Let handlers in between batches
+        await asyncio.sleep(0)
+    return expired
+
+
+async def forfeit_stale_games(cutoff: datetime, batch_size: int,
+                              live: Callable[[int], Awaitable[bool]]) -> List[Game]:
+    """
+    Finish IN_PROGRESS games idle since cutoff (started before it and no
+    move logged after it) that no worker has live: the player whose turn it
+    was forfeits. Works batch_size games per short transaction; returns the
+    forfeited games for the stats update.
+    """
+    moved_since_cutoff = exists().where(Move.game_id == Game.id, Move.created_at >= cutoff)
+    forfeited: List[Game] = []
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            games = (await db.scalars(
+                select(Game)
+                .where(
+                    Game.status == GameStatus.IN_PROGRESS,
+                    Game.started_at < cutoff,
+                    ~moved_since_cutoff,
+                    Game.id > last_id
+                )
+                .order_by(Game.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not games:
+                break
+            last_id = games[-1].id
+
+            batch = [game for game in games if not await live(game.id)]
+            now = datetime.utcnow()
+            for game in batch:
+                if game.current_turn == 1:
+                    game.winner_id, game.result = game.player2_id, GameResult.PLAYER2_WIN
+                else:
+                    game.winner_id, game.result = game.player1_id, GameResult.PLAYER1_WIN
+                game.status = GameStatus.FINISHED
+                game.finished_at = now
+            if batch:
+                await db.execute(
+                    update(Room)
+                    .where(Room.id.in_([game.room_id for game in batch]))
+                    .values(status=GameStatus.FINISHED, finished_at=now)
+                )
+            await db.commit()
+
+        forfeited.extend(batch)
+        if len(games) < batch_size:
+            break
+        await asyncio.sleep(0)
+    return forfeited
+
+
+class Reaper:
+    """Runs a cleanup pass every `interval` seconds"""
+
+    def __init__(self, interval: float = settings.REAPER_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, reap: Callable[[], Awaitable[None]]) -> None:
+        self._task = asyncio.create_task(self._run(reap))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, reap: Callable[[], Awaitable[None]]) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await reap()
+            except Exception as e:
+                print(f"Error in reaper: {str(e)}")
+                ERRORS.labels('reaper').inc()
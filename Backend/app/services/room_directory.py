@@ -0,0 +1,101 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.player import Game, GameStatus, Room
+
+OPEN_STATUSES = (GameStatus.WAITING, GameStatus.IN_PROGRESS)
+
+# Diff operations pushed to lobby clients
+ADD, UPDATE, REMOVE = 'add', 'update', 'remove'
+
+
+def seated(player1_id: Optional[int], player2_id: Optional[int]) -> int:
+    """Players sitting at a room's game"""
+    return (player1_id is not None) + (player2_id is not None)
+
+
+class RoomDirectory:
+    """
+    Open public rooms (waiting or in progress) as the lobby shows them.
+
+    Loaded once at startup, then kept current by room creation, joins and
+    finished or expired games, so lobby reads never touch the DB. Every
+    change is handed to on_change as an add / update / remove diff.
+    """
+
+    def __init__(self):
+        self._rooms: Dict[int, dict] = {}  # room id -> lobby entry, in creation order
+        self.on_change: Optional[Callable[[str, dict], Awaitable[None]]] = None
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Load every open public room and its seat count in one query"""
+        result = await db.execute(
+            select(
+                Room.id, Room.code, Room.name, Room.is_public, Room.status, Room.variant,
+                Game.player1_id, Game.player2_id
+            )
+            .outerjoin(Game, Game.room_id == Room.id)
+            .where(Room.status.in_(OPEN_STATUSES), Room.is_public.is_(True))
+            .order_by(Room.id)
+        )
+        self._rooms = {
+            row.id: {
+                'id': row.id,
+                'code': row.code,
+                'name': row.name,
+                'is_public': row.is_public,
+                'status': row.status.value,
+                'variant': row.variant,
+                'players_count': seated(row.player1_id, row.player2_id)
+            }
+            for row in result
+        }
+
+    def list(self) -> List[dict]:
+        return list(self._rooms.values())
+
+    async def add(self, room: Room, players_count: int = 0) -> None:
+        """Track a new room (private rooms are never listed)"""
+        if not room.is_public or room.status not in OPEN_STATUSES:
+            return
+        entry = self._rooms[room.id] = {
+            'id': room.id,
+            'code': room.code,
+            'name': room.name,
+            'is_public': room.is_public,
+            'status': room.status.value,
+            'variant': room.variant,
+            'players_count': players_count
+        }
+        await self._notify(ADD, entry)
+
+    async def update(self, room_id: int, **changes) -> None:
+        entry = self._rooms.get(room_id)
+        if entry is None or all(entry.get(field) == value for field, value in changes.items()):
+            return
+        entry.update(changes)
+        await self._notify(UPDATE, entry)
+
+    async def remove(self, room_id: int) -> None:
+        entry = self._rooms.pop(room_id, None)
+        if entry is not None:
+            await self._notify(REMOVE, entry)
+
+    def apply(self, op: str, entry: dict) -> None:
+        """Apply a diff made by another worker (not reported again)"""
+        if op == REMOVE:
+            self._rooms.pop(entry['id'], None)
+        elif op == ADD or entry['id'] in self._rooms:
+            self._rooms[entry['id']] = entry
+
+    async def _notify(self, op: str, entry: dict) -> None:
+        if self.on_change is not None:
+            await self.on_change(op, dict(entry))
+
+
+room_directory = RoomDirectory()
@@ -0,0 +1,128 @@
+import asyncio
+import secrets
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class PlayerSession:
+    """A player's seat in a room, resumable from another connection with its token"""
+
+    __slots__ = ('token', 'sid', 'room_code', 'game_id', 'player_id', 'username', 'player_number',
+                 'variant', 'game_over', 'expiry')
+
+    def __init__(self, sid: str, room_code: str, game_id: int, player_id: int, username: str,
+                 player_number: int, variant: str):
+        self.token = secrets.token_urlsafe(16)
+        self.sid: Optional[str] = sid  # None while disconnected
+        self.room_code = room_code
+        self.game_id = game_id
+        self.player_id = player_id
+        self.username = username
+        self.player_number = player_number
+        self.variant = variant
+        self.game_over: Optional[dict] = None  # game_over payload if the game ended meanwhile
+        self.expiry: Optional[asyncio.TimerHandle] = None  # grace timer while disconnected
+
+
+class SessionRegistry:
+    """
+    Resume tokens of the players seated in rooms on this worker.
+
+    A player has one session per room. When its connection drops, the
+    session is kept for grace_seconds: a new connection presenting the token
+    takes the seat back without another join_room. Sessions live in the
+    memory of the worker that issued them.
+    """
+
+    def __init__(self, grace_seconds: float = settings.RESUME_GRACE_SECONDS):
+        self.grace_seconds = grace_seconds
+        self._by_token: Dict[str, PlayerSession] = {}
+        self._by_sid: Dict[str, PlayerSession] = {}
+        self._by_room: Dict[str, Dict[int, PlayerSession]] = {}  # room_code -> player_id -> session
+
+    def __len__(self) -> int:
+        return len(self._by_token)
+
+    def issue(self, sid: str, room_code: str, game_id: int, player_id: int, username: str,
+              player_number: int, variant: str) -> PlayerSession:
+        """New session for a seated player (replacing their previous one in the room)"""
+        previous = self._by_room.get(room_code, {}).get(player_id)
+        if previous is not None:
+            self._discard(previous)
+        session = PlayerSession(sid, room_code, game_id, player_id, username, player_number, variant)
+        self._by_token[session.token] = session
+        self._by_sid[sid] = session
+        self._by_room.setdefault(room_code, {})[player_id] = session
+        return session
+
+    def detach(self, sid: str, on_expire: Callable[[PlayerSession], None]) -> Optional[PlayerSession]:
+        """The sid disconnected: keep its seat for the grace window, then call on_expire"""
+        session = self._by_sid.pop(sid, None)
+        if session is None:
+            return None
+        if session.game_over is not None:
+            # Nothing left to resume
+            self._discard(session)
+            return None
+
+        session.sid = None
+
+        def expire():
+            if self._by_token.get(session.token) is session and session.sid is None:
+                self._discard(session)
+                on_expire(session)
+
+        session.expiry = asyncio.get_running_loop().call_later(self.grace_seconds, expire)
+        return session
+
+    def get(self, token: str) -> Optional[PlayerSession]:
+        return self._by_token.get(token)
+
+    def resume(self, token: str, sid: str) -> Optional[PlayerSession]:
+        """
+        Bind a session to a new sid. Also works before the old connection is
+        noticed as gone (its later disconnect no longer affects the session).
+        """
+        session = self._by_token.get(token)
+        if session is None:
+            return None
+        if session.expiry is not None:
+            session.expiry.cancel()
+            session.expiry = None
+        if session.sid is not None:
+            self._by_sid.pop(session.sid, None)
+        session.sid = sid
+        self._by_sid[sid] = session
+        return session
+
+    def for_sid(self, sid: str) -> Optional[PlayerSession]:
+        return self._by_sid.get(sid)
+
+    def drop_sid(self, sid: str) -> None:
+        """The player left the room for good"""
+        session = self._by_sid.get(sid)
+        if session is not None:
+            self._discard(session)
+
+    def game_over(self, room_code: str, payload: dict) -> None:
+        """Remember the result for players who resume after the game ended"""
+        for session in self._by_room.get(room_code, {}).values():
+            session.game_over = payload
+
+    def in_grace(self, room_code: str) -> bool:
+        """Some player of the room is disconnected but may still come back"""
+        return any(session.sid is None for session in self._by_room.get(room_code, {}).values())
+
+    def _discard(self, session: PlayerSession) -> None:
+        if session.expiry is not None:
+            session.expiry.cancel()
+            session.expiry = None
+        self._by_token.pop(session.token, None)
+        if session.sid is not None and self._by_sid.get(session.sid) is session:
+            del self._by_sid[session.sid]
+        room_sessions = self._by_room.get(session.room_code)
+        if room_sessions is not None and room_sessions.get(session.player_id) is session:
+            del room_sessions[session.player_id]
+            if not room_sessions:
+                del self._by_room[session.room_code]
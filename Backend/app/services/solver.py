@@ -0,0 +1,113 @@
+import random
+from array import array
+from typing import Optional, Tuple
+
+from app.services.bitboard import Board, EMPTY_CELLS, WIN_TABLE, FULL_MASK
+
+# Index of a board in the solved table: the "000000000" column format read as
+# a base-3 number, computed from the masks as _BASE3[player1] + 2 * _BASE3[player2]
+TABLE_SIZE = 3 ** 9
+_BASE3 = tuple(
+    sum(3 ** (8 - i) for i in range(9) if (mask >> i) & 1)
+    for mask in range(FULL_MASK + 1)
+)
+
+# Packed table entry (16 bits):
+#   bits 0-8  : best moves mask for the side to move
+#   bits 9-10 : value for the side to move + 1 (0 = loss, 1 = draw, 2 = win)
+#   bit 15    : position is reachable
+_MOVES_MASK = 0x1FF
+_VALUE_SHIFT = 9
+_REACHABLE = 1 << 15
+
+LOSS, DRAW, WIN = -1, 0, 1
+
+
+def board_index(board: Board) -> int:
+    return _BASE3[board.player1] + 2 * _BASE3[board.player2]
+
+
+class Solver:
+    """Minimax values and best moves for every reachable tic-tac-toe position"""
+
+    def __init__(self):
+        self._table: Optional[array] = None
+        self.positions = 0
+
+    @property
+    def built(self) -> bool:
+        return self._table is not None
+
+    def build(self) -> "Solver":
+        """Enumerate and solve every position reachable from the empty board"""
+        table = array('H', bytes(2 * TABLE_SIZE))
+        self.positions = 0
+
+        def solve(player1: int, player2: int, to_move: int) -> int:
+            index = _BASE3[player1] + 2 * _BASE3[player2]
+            entry = table[index]
+            if entry:
+                return ((entry >> _VALUE_SHIFT) & 0b11) - 1
+            self.positions += 1
+
+            if WIN_TABLE[player2 if to_move == 1 else player1]:
+                # The previous move won: the side to move has lost
+                best_value, best_moves = LOSS, 0
+            elif player1 | player2 == FULL_MASK:
+                best_value, best_moves = DRAW, 0
+            else:
+                best_value, best_moves = LOSS - 1, 0
+                for position in EMPTY_CELLS[player1 | player2]:
+                    bit = 1 << position
+                    if to_move == 1:
+                        value = -solve(player1 | bit, player2, 2)
+                    else:
+                        value = -solve(player1, player2 | bit, 1)
+                    if value > best_value:
+                        best_value, best_moves = value, bit
+                    elif value == best_value:
+                        best_moves |= bit
+
+            table[index] = _REACHABLE | ((best_value + 1) << _VALUE_SHIFT) | best_moves
+            return best_value
+
+        solve(0, 0, 1)
+        self._table = table
+        return self
+
+    def _entry(self, board: Board) -> int:
+        if self._table is None:
+            self.build()
+        entry = self._table[board_index(board)]
+        if not entry & _REACHABLE:
+            raise ValueError(f"Unreachable position: {board.to_string()}")
+        return entry
+
+    def value(self, board: Board) -> int:
+        """Game value for the side to move with perfect play (WIN / DRAW / LOSS)"""
+        return ((self._entry(board) >> _VALUE_SHIFT) & 0b11) - 1
+
+    def best_moves(self, board: Board) -> Tuple[int, ...]:
+        """All optimal moves for the side to move (empty if the game is over)"""
+        return EMPTY_CELLS[~self._entry(board) & _MOVES_MASK]
+
+    def choose_move(self, board: Board, mistake_rate: float = 0.0,
+                    rng: Optional[random.Random] = None) -> Optional[int]:
+        """
+        Pick a move for the side to move.
+        With probability mistake_rate a random non-optimal move is played instead.
+        """
+        rng = rng or random
+        best = self.best_moves(board)
+        if not best:
+            return None
+
+        if mistake_rate and rng.random() < mistake_rate:
+            others = [position for position in board.available_moves() if position not in best]
+            if others:
+                return rng.choice(others)
+
+        return rng.choice(best)
+
+
+solver = Solver()
@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import socketio
+
+from app.core.config import settings
+from app.services.metrics import (
+    BROADCAST_DROPPED, BROADCAST_EVENTS, BROADCAST_FRAMES, BROADCAST_SLOW_CLIENTS, ERRORS
+)
+
+# Frame carrying several room events: [{'event': name, 'data': payload}, ...] in publish order
+BATCH_EVENT = 'batch'
+
+Pending = Tuple[str, Any, Optional[str]]  # (event, data, skip_sid)
+
+
+class RoomBroadcaster:
+    """
+    Per-room outbound queues for events sent to a whole room.
+
+    publish() only appends to the room's queue, so a handler never waits for
+    delivery. A flush task per room waits `window` seconds (0 = the rest of
+    the current event-loop tick) and sends everything queued by then as one
+    frame: a lone event goes out as itself, several as one `batch` event.
+    Events of a room are always sent in the order they were published.
+
+    Backpressure: past max_pending queued events a room sheds droppable
+    events (chat) instead of growing, and a client whose Engine.IO send queue
+    holds more than max_client_backlog packets is disconnected rather than
+    buffered for without bound.
+    """
+
+    def __init__(self, sio: socketio.AsyncServer, window: float = settings.BROADCAST_WINDOW_SECONDS,
+                 max_pending: int = settings.BROADCAST_MAX_PENDING,
+                 max_client_backlog: int = settings.BROADCAST_MAX_CLIENT_BACKLOG):
+        self.sio = sio
+        self.window = window
+        self.max_pending = max_pending
+        self.max_client_backlog = max_client_backlog
+        self._pending: Dict[str, Deque[Pending]] = {}  # room -> events not sent yet
+        self._tasks: Dict[str, asyncio.Task] = {}  # room -> flush task
+
+    @property
+    def pending(self) -> int:
+        return sum(len(events) for events in self._pending.values())
+
+    def publish(self, room: str, event: str, data: Any, skip_sid: Optional[str] = None,
+                droppable: bool = False) -> None:
+        """Queue an event for everyone in `room` (but skip_sid)"""
+        events = self._pending.get(room)
+        if events is None:
+            events = self._pending[room] = deque()
+        if droppable and len(events) >= self.max_pending:
+            BROADCAST_DROPPED.labels(event).inc()
+            return
+
+        events.append((event, data, skip_sid))
+        if room not in self._tasks:
+            self._tasks[room] = asyncio.create_task(self._flush_room(room))
+
+    async def stop(self) -> None:
+        """Send everything still queued"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _flush_room(self, room: str) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                events = self._pending.pop(room, None)
+                if not events:
+                    return
+                await self._send(room, events)
+        finally:
+            self._tasks.pop(room, None)
+
+    async def _send(self, room: str, events: Deque[Pending]) -> None:
+        try:
+            await self._drop_slow_clients(room)
+            # Events skipping a sender (player_joined) can only share a frame with their neighbours
+            for skip_sid, group in itertools.groupby(events, key=lambda pending: pending[2]):
+                group = list(group)
+                if len(group) == 1:
+                    event, data, _ = group[0]
+                    await self.sio.emit(event, data, room=room, skip_sid=skip_sid)
+                else:
+                    await self.sio.emit(BATCH_EVENT, [
+                        {'event': event, 'data': data} for event, data, _ in group
+                    ], room=room, skip_sid=skip_sid)
+                BROADCAST_FRAMES.inc()
+            BROADCAST_EVENTS.inc(len(events))
+        except Exception as e:
+            print(f"Error broadcasting to {room}: {str(e)}")
+            ERRORS.labels('broadcast').inc()
+
+    async def _drop_slow_clients(self, room: str) -> None:
+        """Disconnect this worker's clients in the room that are not reading their frames"""
+        slow: List[str] = []
+        for sid, eio_sid in self.sio.manager.get_participants('/', room):
+            socket = self.sio.eio.sockets.get(eio_sid)
+            if socket is not None and socket.queue.qsize() > self.max_client_backlog:
+                slow.append(sid)
+        for sid in slow:
+            BROADCAST_SLOW_CLIENTS.inc()
+            await self.sio.disconnect(sid)
@@ -0,0 +1,263 @@
+import asyncio
+import pickle
+import uuid
+from collections import defaultdict
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Only needed for multi-worker deployments
+    aioredis = None
+
+from app.core.config import settings
+from app.services.metrics import ERRORS
+
+# Channel every worker listens on, in addition to its own worker channel
+BROADCAST_CHANNEL = "tictactoe:cluster"
+
+
+class LocalPubSubBus:
+    """
+    In-process pub/sub broker standing in for Redis.
+    Workers sharing one bus in the same process behave like separate processes
+    (messages are pickled, so nothing is shared by reference).
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+
+    async def publish(self, channel: str, message) -> None:
+        payload = pickle.dumps(message)
+        for queue in list(self._subscribers.get(channel, ())):
+            queue.put_nowait(payload)
+
+    async def subscribe(self, channel: str) -> AsyncIterator:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[channel].append(queue)
+        try:
+            while True:
+                yield pickle.loads(await queue.get())
+        finally:
+            self._subscribers[channel].remove(queue)
+
+
+class RedisPubSubBus:
+    """Redis pub/sub broker for workers in separate processes or hosts"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def publish(self, channel: str, message) -> None:
+        await self.redis.publish(channel, pickle.dumps(message))
+
+    async def subscribe(self, channel: str) -> AsyncIterator:
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get('type') == 'message':
+                    yield pickle.loads(message['data'])
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+
+
+class LocalPubSubManager(AsyncPubSubManager):
+    """Socket.IO client manager on top of a LocalPubSubBus"""
+
+    name = 'localpubsub'
+
+    def __init__(self, bus: LocalPubSubBus, channel: str = 'socketio', write_only: bool = False, logger=None):
+        self.bus = bus
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    async def _publish(self, data):
+        await self.bus.publish(self.channel, data)
+
+    async def _listen(self):
+        async for message in self.bus.subscribe(self.channel):
+            yield message
+
+
+class InMemoryClusterState:
+    """Room membership and game ownership shared by the workers of one process"""
+
+    def __init__(self):
+        self._rooms: Dict[str, Set[str]] = {}
+        self._owners: Dict[int, str] = {}
+        self._counted = 0  # Members of rooms added with counted=True
+
+    async def add_room_member(self, room_code: str, sid: str, counted: bool = True) -> int:
+        """Add sid to a room; counted=False keeps it out of total_members (spectators)"""
+        members = self._rooms.setdefault(room_code, set())
+        if sid not in members:
+            members.add(sid)
+            self._counted += counted
+        return len(members)
+
+    async def remove_room_member(self, room_code: str, sid: str, counted: bool = True) -> int:
+        members = self._rooms.get(room_code)
+        if members is None:
+            return 0
+        if sid in members:
+            members.discard(sid)
+            self._counted -= counted
+        if not members:
+            del self._rooms[room_code]
+        return len(members)
+
+    async def room_size(self, room_code: str) -> int:
+        return len(self._rooms.get(room_code, ()))
+
+    async def total_members(self) -> int:
+        return self._counted
+
+    async def claim_game(self, game_id: int, worker_id: str) -> str:
+        """Make worker_id the owner unless the game has one; returns the owner"""
+        return self._owners.setdefault(game_id, worker_id)
+
+    async def game_owner(self, game_id: int) -> Optional[str]:
+        return self._owners.get(game_id)
+
+    async def release_game(self, game_id: int, worker_id: str) -> None:
+        if self._owners.get(game_id) == worker_id:
+            del self._owners[game_id]
+
+
+class RedisClusterState:
+    """Room membership and game ownership stored in Redis"""
+
+    MEMBERS_KEY = "tictactoe:members"
+
+    # Delete the owner key only if it still belongs to the releasing worker
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    @staticmethod
+    def _room_key(room_code: str) -> str:
+        return f"tictactoe:room:{room_code}:sids"
+
+    @staticmethod
+    def _owner_key(game_id: int) -> str:
+        return f"tictactoe:game:{game_id}:owner"
+
+    async def add_room_member(self, room_code: str, sid: str, counted: bool = True) -> int:
+        """Add sid to a room; counted=False keeps it out of total_members (spectators)"""
+        key = self._room_key(room_code)
+        if await self.redis.sadd(key, sid) and counted:
+            await self.redis.incr(self.MEMBERS_KEY)
+        return await self.redis.scard(key)
+
+    async def remove_room_member(self, room_code: str, sid: str, counted: bool = True) -> int:
+        key = self._room_key(room_code)
+        if await self.redis.srem(key, sid) and counted:
+            await self.redis.decr(self.MEMBERS_KEY)
+        return await self.redis.scard(key)
+
+    async def room_size(self, room_code: str) -> int:
+        return await self.redis.scard(self._room_key(room_code))
+
+    async def total_members(self) -> int:
+        return max(int(await self.redis.get(self.MEMBERS_KEY) or 0), 0)
+
+    async def claim_game(self, game_id: int, worker_id: str) -> str:
+        key = self._owner_key(game_id)
+        await self.redis.set(key, worker_id, nx=True)
+        owner = await self.redis.get(key)
+        return owner.decode() if isinstance(owner, bytes) else owner
+
+    async def game_owner(self, game_id: int) -> Optional[str]:
+        owner = await self.redis.get(self._owner_key(game_id))
+        return owner.decode() if isinstance(owner, bytes) else owner
+
+    async def release_game(self, game_id: int, worker_id: str) -> None:
+        await self.redis.eval(self.RELEASE_SCRIPT, 1, self._owner_key(game_id), worker_id)
+
+
+class Cluster:
+    """
+    This worker's view of the cluster: shared state, the message bus, and
+    routing of messages to the worker that owns a live game.
+    """
+
+    def __init__(self, state, bus, worker_id: Optional[str] = None):
+        self.state = state
+        self.bus = bus
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def local(cls, bus: Optional[LocalPubSubBus] = None, state: Optional[InMemoryClusterState] = None,
+              worker_id: Optional[str] = None) -> "Cluster":
+        return cls(state or InMemoryClusterState(), bus or LocalPubSubBus(), worker_id)
+
+    @staticmethod
+    def worker_channel(worker_id: str) -> str:
+        return f"tictactoe:worker:{worker_id}"
+
+    async def send(self, worker_id: str, message: dict) -> None:
+        """Deliver a message to one worker"""
+        await self.bus.publish(self.worker_channel(worker_id), message)
+
+    async def broadcast(self, message: dict) -> None:
+        """Deliver a message to every other worker"""
+        await self.bus.publish(BROADCAST_CHANNEL, {**message, 'origin': self.worker_id})
+
+    async def start(self, on_message: Callable[[dict], Awaitable[None]]) -> None:
+        """Listen on this worker's channel and the broadcast channel"""
+        for channel in (self.worker_channel(self.worker_id), BROADCAST_CHANNEL):
+            self._tasks.append(asyncio.create_task(self._listen(channel, on_message)))
+        # Let the subscriptions register before anything is published
+        await asyncio.sleep(0)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _listen(self, channel: str, on_message: Callable[[dict], Awaitable[None]]) -> None:
+        async for message in self.bus.subscribe(channel):
+            if message.get('origin') == self.worker_id:
+                continue
+            try:
+                await on_message(message)
+            except Exception as e:
+                print(f"Error handling cluster message {message.get('type')}: {str(e)}")
+                ERRORS.labels('cluster').inc()
+
+
+# Shared by every Cluster.local() built from settings, so in-process workers see each other
+_local_bus = LocalPubSubBus()
+_local_state = InMemoryClusterState()
+
+
+def create_cluster() -> Cluster:
+    """Cluster backend from SOCKETIO_MESSAGE_QUEUE ("" / "local" = in-process, redis://... = Redis)"""
+    url = settings.SOCKETIO_MESSAGE_QUEUE
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        if aioredis is None:
+            raise RuntimeError('Redis package is not installed (pip install redis)')
+        redis = aioredis.Redis.from_url(url)
+        return Cluster(RedisClusterState(redis), RedisPubSubBus(redis))
+    return Cluster.local(_local_bus, _local_state)
+
+
+def create_client_manager(cluster: Cluster) -> Optional[socketio.AsyncManager]:
+    """Socket.IO client manager matching the cluster backend (None = single process)"""
+    url = settings.SOCKETIO_MESSAGE_QUEUE
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return socketio.AsyncRedisManager(url)
+    if url == "local":
+        return LocalPubSubManager(cluster.bus)
+    return None
@@ -1,51 +1,104 @@
+import secrets
 import socketio
-from typing import Dict, Set
-from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Set
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.session import SessionLocal
+from app.database.session import AsyncSessionLocal
 from app.models.player import Game, Room, Player, GameStatus, GameResult
+from app.core.config import settings
+from app.services.board_engine import DEFAULT_VARIANT, VARIANTS, create_board
+from app.services.chat import ChatError, ChatRooms
 from app.services.game_services import GameService
+from app.services.leaderboard import leaderboard
+from app.services.live_games import GameLocks, LiveGame, LiveGameRegistry, MoveError
+from app.services.lookups import find_room, get_or_create_player, is_reserved_username
+from app.services.matchmaking import Match, MatchmakingQueue, player_rating
+from app.services.metrics import ERRORS, REAPED
+from app.services.move_log import move_log
+from app.services.reaper import expire_waiting_rooms, forfeit_stale_games
+from app.services.room_directory import room_directory, seated
+from app.services.sessions import PlayerSession, SessionRegistry
+from app.services.solver import solver
+from app.websocket.broadcast import RoomBroadcaster
+from app.websocket.cluster import Cluster
+from app.websocket.spectators import SpectatorFanout, spectator_room
+
+# Socket.IO room of the clients watching the lobby
+LOBBY_ROOM = 'lobby'
 
 class GameHandler:
-    def __init__(self, sio: socketio.AsyncServer):
+    def __init__(self, sio: socketio.AsyncServer, cluster: Optional[Cluster] = None):
         self.sio = sio
-        self.active_connections: Dict[str, Dict] = {}  # sid -> {room_code, player_id}
-        self.rooms: Dict[str, Set[str]] = {}  # room_code -> set of sids
+        # Cluster-wide room membership and live game owners (single worker by default)
+        self.cluster = cluster or Cluster.local()
+        self.active_connections: Dict[str, Dict] = {}  # sid -> {room_code, player_id} (this worker's sids)
+        self.rooms: Dict[str, Set[str]] = {}  # room_code -> set of this worker's sids
+        self.spectating: Dict[str, str] = {}  # sid -> room_code (this worker's spectators)
+        # Room events go through per-room queues; replies to a single sid are emitted directly
+        self.broadcaster = RoomBroadcaster(sio)
+        # Spectators get game events through their own sub-room, off the players' path
+        self.spectators = SpectatorFanout(sio)
+        self.spectators.relay = self._relay_spectator_events
+        self.chat = ChatRooms()
+        self.sessions = SessionRegistry()
         self.game_service = GameService()
-
-    def get_db(self) -> Session:
-        return SessionLocal()
+        self.live_games = LiveGameRegistry(settings.GAME_CHECKPOINT_MOVES)
+        self.game_locks = GameLocks(settings.GAME_LOCKS_MAX_SIZE)
+        self.bot_player_id: Optional[int] = None
+        self.matchmaking = MatchmakingQueue(
+            settings.MATCHMAKING_BASE_WINDOW,
+            settings.MATCHMAKING_WINDOW_GROWTH,
+            settings.MATCHMAKING_MAX_WINDOW
+        )
+
+    def get_db(self) -> AsyncSession:
+        return AsyncSessionLocal()
 
     async def handle_join_room(self, sid: str, data: dict):
-        """Handle player joining a room"""
+        """
+        Handle player joining a room.
+        Pass vs_bot (and optionally difficulty) when creating the game to play
+        against the solver bot as player2.
+        """
         try:
             room_code = data.get('room_code')
             player_id = data.get('player_id')
             username = data.get('username')
+            vs_bot = bool(data.get('vs_bot'))
+            difficulty = data.get('difficulty') or settings.BOT_DEFAULT_DIFFICULTY
+
+            if vs_bot and difficulty not in settings.BOT_MISTAKE_RATES:
+                await self.sio.emit('error', {'message': 'Unknown difficulty'}, room=sid)
+                return
 
             if not room_code or not username:
                 await self.sio.emit('error', {'message': 'Missing room_code or username'}, room=sid)
                 return
+            if is_reserved_username(username):
+                await self.sio.emit('error', {'message': 'This username is reserved'}, room=sid)
+                return
 
-            db = self.get_db()
-            try:
-                # Get or create player
-                player = db.query(Player).filter(Player.username == username).first()
-                if not player:
-                    player = Player(username=username, display_name=username)
-                    db.add(player)
-                    db.commit()
-                    db.refresh(player)
-                
+            # Joining a room directly gives up a place in the matchmaking queue
+            self.matchmaking.remove(sid)
+
+            async with self.get_db() as db:
+                # Player and room usually come from the lookup caches; the game row is the one read
+                player = await get_or_create_player(db, username)
                 player_id = player.id
 
                 # Get room
-                room = db.query(Room).filter(Room.code == room_code).first()
+                room = await find_room(db, room_code)
                 if not room:
                     await self.sio.emit('error', {'message': 'Room not found'}, room=sid)
                     return
 
+                variant = room.variant or DEFAULT_VARIANT
+                if vs_bot and variant != DEFAULT_VARIANT:
+                    await self.sio.emit('error', {'message': 'The bot only plays the classic variant'}, room=sid)
+                    return
+
                 # Join socket.io room
                 await self.sio.enter_room(sid, room_code)
                 
@@ -59,57 +112,311 @@ class GameHandler:
                 if room_code not in self.rooms:
                     self.rooms[room_code] = set()
                 self.rooms[room_code].add(sid)
+                players_count = await self.cluster.state.add_room_member(room_code, sid)
 
                 # Get or create game
-                game = db.query(Game).filter(Game.room_id == room.id).first()
-                if not game:
+                game = await db.scalar(select(Game).where(Game.room_id == room.id))
+                started = False  # This join starts the game
+                if not game and vs_bot:
                     game = Game(
                         room_id=room.id,
                         player1_id=player_id,
+                        variant=variant,
+                        player2_id=await self._get_bot_player_id(db),
+                        status=GameStatus.IN_PROGRESS,
+                        started_at=datetime.utcnow()
+                    )
+                    db.add(game)
+                    started = True
+                elif not game:
+                    game = Game(
+                        room_id=room.id,
+                        player1_id=player_id,
+                        variant=variant,
+                        board_state=create_board(variant).to_string(),
                         status=GameStatus.WAITING
                     )
                     db.add(game)
-                elif not game.player2_id:
+                elif not game.player2_id and game.player1_id != player_id:
+                    # player1 coming back must not take the second seat too
                     game.player2_id = player_id
                     game.status = GameStatus.IN_PROGRESS
                     game.started_at = datetime.utcnow()
-                    room.status = GameStatus.IN_PROGRESS
-                    room.started_at = datetime.utcnow()
+                    started = True
 
-                db.commit()
-                db.refresh(game)
-
-                # Notify room
+                if started:
+                    await db.execute(
+                        update(Room)
+                        .where(Room.id == room.id)
+                        .values(status=GameStatus.IN_PROGRESS, started_at=game.started_at)
+                    )
+                await db.commit()
+                # The room's status follows its game's
+                await room_directory.update(
+                    room.id, status=game.status.value, players_count=seated(game.player1_id, game.player2_id)
+                )
+
+                # Seated players get a token to resume with after a dropped connection
+                player_number = 1 if game.player1_id == player_id else 2 if game.player2_id == player_id else None
+                resume_token = None
+                if player_number is not None:
+                    resume_token = self.sessions.issue(
+                        sid, room_code, game.id, player_id, username, player_number, game.variant
+                    ).token
+
+                # Notify room (a player coming back mid-game gets the position to redraw)
+                state = self._game_state(game)
                 await self.sio.emit('room_joined', {
                     'room_code': room_code,
                     'player_id': player_id,
                     'username': username,
                     'game_id': game.id,
-                    'player_number': 1 if game.player1_id == player_id else 2
+                    'variant': game.variant,
+                    'player_number': player_number,
+                    **state,
+                    'resume_token': resume_token,
+                    'chat_history': self.chat.history(room_code)
                 }, room=sid)
 
                 # Broadcast to room
-                await self.sio.emit('player_joined', {
+                self.broadcaster.publish(room_code, 'player_joined', {
                     'username': username,
-                    'players_count': len(self.rooms[room_code])
-                }, room=room_code, skip_sid=sid)
+                    'players_count': players_count
+                }, skip_sid=sid)
 
                 # Start game if both players present
                 if game.player2_id and game.status == GameStatus.IN_PROGRESS:
-                    await self.sio.emit('game_started', {
+                    # The worker that starts the game owns its live state
+                    owner = await self.cluster.state.claim_game(game.id, self.cluster.worker_id)
+                    if owner == self.cluster.worker_id and game.id not in self.live_games:
+                        bot_options = {}
+                        if vs_bot:
+                            bot_options = {
+                                'bot_player_id': game.player2_id,
+                                'bot_mistake_rate': settings.BOT_MISTAKE_RATES[difficulty]
+                            }
+                        self.live_games.add(LiveGame.from_model(game, room_code, **bot_options))
+
+                    game_started = {
                         'game_id': game.id,
-                        'player1': db.query(Player).get(game.player1_id).username,
-                        'player2': db.query(Player).get(game.player2_id).username,
-                        'current_turn': game.current_turn
-                    }, room=room_code)
-
-            finally:
-                db.close()
+                        'player1': await self._username(db, game.player1_id),
+                        'player2': await self._username(db, game.player2_id),
+                        **self._game_state(game)
+                    }
+                    self.broadcaster.publish(room_code, 'game_started', game_started)
+                    # game_started already has the live board; the row's may be behind it
+                    self.spectators.publish(room_code, 'game_started', dict(game_started, variant=game.variant))
 
         except Exception as e:
             print(f"Error in join_room: {str(e)}")
+            ERRORS.labels('join_room').inc()
+            await self.sio.emit('error', {'message': str(e)}, room=sid)
+
+    def _game_state(self, game: Game) -> dict:
+        """Board, turn and moves played so far; the live state is ahead of the row between checkpoints"""
+        live_game = self.live_games.get(game.id)
+        if live_game is None:
+            return {'board': game.board_state, 'current_turn': game.current_turn, 'move_number': game.total_moves}
+        return {
+            'board': live_game.board_state,
+            'current_turn': live_game.current_turn,
+            'move_number': live_game.total_moves
+        }
+
+    async def _username(self, db: AsyncSession, player_id: int) -> str:
+        """Username from the in-memory leaderboard, which has every player"""
+        entry = leaderboard.get(player_id)
+        return entry.username if entry is not None else (await db.get(Player, player_id)).username
+
+    async def handle_join_queue(self, sid: str, data: dict):
+        """Queue a player for matchmaking; the match is announced with match_found"""
+        try:
+            username = data.get('username')
+            variant = data.get('variant') or DEFAULT_VARIANT
+
+            if not username:
+                await self.sio.emit('error', {'message': 'Missing username'}, room=sid)
+                return
+            if is_reserved_username(username):
+                await self.sio.emit('error', {'message': 'This username is reserved'}, room=sid)
+                return
+            if variant not in VARIANTS:
+                await self.sio.emit('error', {'message': 'Unknown variant'}, room=sid)
+                return
+            if sid in self.active_connections:
+                await self.sio.emit('error', {'message': 'Already in a room'}, room=sid)
+                return
+
+            async with self.get_db() as db:
+                player = await get_or_create_player(db, username)
+
+            entry = self.matchmaking.add(sid, player.id, username, player_rating(player.id), variant)
+            await self.sio.emit('queue_joined', {
+                'variant': variant,
+                'rating': entry.rating,
+                'queue_size': len(self.matchmaking)
+            }, room=sid)
+
+        except Exception as e:
+            print(f"Error in join_queue: {str(e)}")
+            ERRORS.labels('join_queue').inc()
             await self.sio.emit('error', {'message': str(e)}, room=sid)
 
+    async def handle_leave_queue(self, sid: str, data: dict):
+        """Take a player out of the matchmaking queue"""
+        if self.matchmaking.remove(sid):
+            await self.sio.emit('queue_left', {}, room=sid)
+
+    async def create_matches(self, matches: List[Match]):
+        """Create the rooms and games of a pairing pass in one transaction, then seat the players"""
+        # pair() took the players out of the queue, so disconnects since then went unnoticed
+        ready = []
+        for match in matches:
+            if all(self.sio.manager.is_connected(entry.sid, '/') for entry in match):
+                ready.append(match)
+            else:
+                await self._requeue_matches([match])
+        matches = ready
+        if not matches:
+            return
+
+        try:
+            rooms, games = await self._insert_matches(matches)
+        except Exception:
+            # Nobody was seated: back in the queue for the next pass
+            await self._requeue_matches(matches)
+            raise
+
+        for room, game, match in zip(rooms, games, matches):
+            try:
+                await self._seat_match(room, game, match)
+            except Exception as e:
+                # Typically a player disconnected while the rows were inserted
+                print(f"Error seating match {room.code}: {str(e)}")
+                ERRORS.labels('matchmaking').inc()
+                await self._cancel_match(room, game, match)
+
+    async def _requeue_matches(self, matches: List[Match]):
+        """Put the players of matches that could not be created back in the queue"""
+        for match in matches:
+            for entry in match:
+                # Players that disconnected or joined a room meanwhile are not waiting any more
+                if self.sio.manager.is_connected(entry.sid, '/') and entry.sid not in self.active_connections:
+                    if self.matchmaking.requeue(entry):
+                        await self.sio.emit('queue_joined', {
+                            'variant': entry.variant,
+                            'rating': entry.rating,
+                            'queue_size': len(self.matchmaking)
+                        }, room=entry.sid)
+
+    async def _cancel_match(self, room: Room, game: Game, match: Match):
+        """Undo a match that could not be seated: no live game, no rows, players back in the queue"""
+        try:
+            self.live_games.remove(game.id)
+            self.spectators.close_room(room.code)
+            await self.cluster.state.release_game(game.id, self.cluster.worker_id)
+            for entry in match:
+                connection = self.active_connections.get(entry.sid)
+                if connection is not None and connection['room_code'] == room.code:
+                    del self.active_connections[entry.sid]
+                    await self.sio.leave_room(entry.sid, room.code)
+                self.sessions.drop_sid(entry.sid)
+                self.rooms.get(room.code, set()).discard(entry.sid)
+                await self.cluster.state.remove_room_member(room.code, entry.sid)
+            self.rooms.pop(room.code, None)
+            # Never played: removed rather than left for the reaper to forfeit
+            async with self.get_db() as db:
+                await db.execute(delete(Game).where(Game.id == game.id))
+                await db.execute(delete(Room).where(Room.id == room.id))
+                await db.commit()
+        except Exception as e:
+            print(f"Error cancelling match {room.code}: {str(e)}")
+            ERRORS.labels('matchmaking').inc()
+        await self._requeue_matches([match])
+
+    async def _insert_matches(self, matches: List[Match]):
+        """Insert the rooms and games of a pairing pass in one transaction"""
+        now = datetime.utcnow()
+        async with self.get_db() as db:
+            # One multi-row INSERT ... RETURNING for the rooms and one for the games.
+            # RETURNING order is not guaranteed, so rows are matched back by code / room_id
+            codes = [secrets.token_hex(4).upper() for _ in matches]
+            rooms_by_code = {room.code: room for room in await db.scalars(
+                insert(Room).returning(Room),
+                [
+                    {
+                        'code': code,
+                        'name': f"{first.username} vs {second.username}",
+                        'is_public': False,
+                        'variant': first.variant,
+                        'created_by': first.player_id,
+                        'status': GameStatus.IN_PROGRESS,
+                        'started_at': now
+                    }
+                    for code, (first, second) in zip(codes, matches)
+                ]
+            )}
+            rooms = [rooms_by_code[code] for code in codes]
+
+            games_by_room = {game.room_id: game for game in await db.scalars(
+                insert(Game).returning(Game),
+                [
+                    {
+                        'room_id': room.id,
+                        'player1_id': first.player_id,
+                        'player2_id': second.player_id,
+                        'variant': room.variant,
+                        'board_state': create_board(room.variant).to_string(),
+                        'status': GameStatus.IN_PROGRESS,
+                        'started_at': now
+                    }
+                    for room, (first, second) in zip(rooms, matches)
+                ]
+            )}
+            games = [games_by_room[room.id] for room in rooms]
+            await db.commit()
+        return rooms, games
+
+    async def _seat_match(self, room: Room, game: Game, match: Match):
+        """Start a created match's game and announce it to both players"""
+        first, second = match
+        await self.cluster.state.claim_game(game.id, self.cluster.worker_id)
+        self.live_games.add(LiveGame.from_model(game, room.code))
+
+        for player_number, entry in ((1, first), (2, second)):
+            await self.sio.enter_room(entry.sid, room.code)
+            self.active_connections[entry.sid] = {
+                'room_code': room.code,
+                'player_id': entry.player_id,
+                'username': entry.username
+            }
+            self.rooms.setdefault(room.code, set()).add(entry.sid)
+            await self.cluster.state.add_room_member(room.code, entry.sid)
+            session = self.sessions.issue(
+                entry.sid, room.code, game.id, entry.player_id, entry.username, player_number, game.variant
+            )
+            await self.sio.emit('match_found', {
+                'room_code': room.code,
+                'player_id': entry.player_id,
+                'username': entry.username,
+                'game_id': game.id,
+                'variant': game.variant,
+                'player_number': player_number,
+                'move_number': 0,
+                'resume_token': session.token,
+                'opponent': (second if player_number == 1 else first).username
+            }, room=entry.sid)
+
+        game_started = {
+            'game_id': game.id,
+            'player1': first.username,
+            'player2': second.username,
+            'current_turn': game.current_turn,
+            'move_number': 0
+        }
+        self.broadcaster.publish(room.code, 'game_started', game_started)
+        self.spectators.publish(room.code, 'game_started', dict(game_started, board=game.board_state, variant=game.variant))
+
     async def handle_leave_room(self, sid: str, data: dict):
         """Handle player leaving a room"""
         if sid not in self.active_connections:
@@ -119,12 +426,16 @@ class GameHandler:
         room_code = connection['room_code']
 
         await self.sio.leave_room(sid, room_code)
+        self.sessions.drop_sid(sid)
         self.rooms[room_code].discard(sid)
+        if not self.rooms[room_code] and not self.sessions.in_grace(room_code):
+            self.chat.close_room(room_code)
+        await self.cluster.state.remove_room_member(room_code, sid)
         del self.active_connections[sid]
 
-        await self.sio.emit('player_left', {
+        self.broadcaster.publish(room_code, 'player_left', {
             'username': connection['username']
-        }, room=room_code)
+        })
 
     async def handle_make_move(self, sid: str, data: dict):
         """Handle player making a move"""
@@ -133,95 +444,400 @@ class GameHandler:
                 return
 
             game_id = data.get('game_id')
-            position = data.get('position')  # 0-8
+            position = data.get('position')  # 0 .. width * height - 1
+            # Moves played before this one, as last seen by the client (move_number of the last move_made)
+            move_number = data.get('move_number')
             
-            if position is None or not (0 <= position <= 8):
+            if not isinstance(position, int) or position < 0:
                 await self.sio.emit('error', {'message': 'Invalid position'}, room=sid)
                 return
+            if not isinstance(move_number, int):
+                await self.sio.emit('error', {'message': 'Missing move_number'}, room=sid)
+                return
 
             connection = self.active_connections[sid]
-            room_code = connection['room_code']
-            player_id = connection['player_id']
+            await self._handle_move(
+                sid, connection['player_id'], connection['room_code'], game_id, position, move_number
+            )
 
-            db = self.get_db()
-            try:
-                game = db.query(Game).get(game_id)
-                if not game:
-                    await self.sio.emit('error', {'message': 'Game not found'}, room=sid)
-                    return
+        except Exception as e:
+            print(f"Error in make_move: {str(e)}")
+            ERRORS.labels('make_move').inc()
+            await self.sio.emit('error', {'message': str(e)}, room=sid)
 
-                # Validate turn
-                current_player = game.player1_id if game.current_turn == 1 else game.player2_id
-                if current_player != player_id:
-                    await self.sio.emit('error', {'message': 'Not your turn'}, room=sid)
+    async def _handle_move(self, sid: str, player_id: int, room_code: str, game_id: int, position: int,
+                           move_number: int):
+        """Apply a move on the worker that owns the game, forwarding it there if needed"""
+        try:
+            # Moves of one game run one at a time (load, move, bot reply, writes);
+            # other games are not held up
+            async with self.game_locks.hold(game_id):
+                # Moves are validated and applied against the in-memory state;
+                # the DB is only read here if no worker has the game live
+                live_game = self.live_games.get(game_id)
+                if not live_game:
+                    owner = await self.cluster.state.claim_game(game_id, self.cluster.worker_id)
+                    if owner != self.cluster.worker_id:
+                        await self.cluster.send(owner, {
+                            'type': 'make_move',
+                            'sid': sid,
+                            'player_id': player_id,
+                            'room_code': room_code,
+                            'game_id': game_id,
+                            'position': position,
+                            'move_number': move_number
+                        })
+                        return
+
+                    live_game = await self._load_live_game(game_id, room_code)
+                    if not live_game:
+                        await self.cluster.state.release_game(game_id, self.cluster.worker_id)
+                        await self.sio.emit('error', {'message': 'Game not found'}, room=sid)
+                        return
+
+                # A double click or a move sent before the client saw the last one
+                if move_number != live_game.total_moves:
+                    await self.sio.emit('error', {
+                        'message': 'Stale move',
+                        'move_number': live_game.total_moves
+                    }, room=sid)
                     return
 
-                # Validate position is empty
-                board = list(game.board_state)
-                if board[position] != '0':
-                    await self.sio.emit('error', {'message': 'Position already taken'}, room=sid)
+                try:
+                    await self._play_move(live_game, player_id, position)
+                except MoveError as e:
+                    await self.sio.emit('error', {'message': str(e)}, room=sid)
                     return
 
-                # Make move
-                board[position] = str(game.current_turn)
-                game.board_state = ''.join(board)
-                game.total_moves += 1
+                # Bot answers straight from the solved table
+                if live_game.bot_to_move and live_game.game_id in self.live_games:
+                    bot_position = solver.choose_move(live_game.board, live_game.bot_mistake_rate)
+                    await self._play_move(live_game, live_game.bot_player_id, bot_position)
 
-                # Check for winner
-                winner = self.game_service.check_winner(game.board_state)
-                
-                if winner:
-                    game.status = GameStatus.FINISHED
-                    game.finished_at = datetime.utcnow()
-                    if winner == 1:
-                        game.winner_id = game.player1_id
-                        game.result = GameResult.PLAYER1_WIN
-                    elif winner == 2:
-                        game.winner_id = game.player2_id
-                        game.result = GameResult.PLAYER2_WIN
-                    else:
-                        game.result = GameResult.DRAW
-
-                    # Update player stats
-                    self.game_service.update_player_stats(db, game)
-                    
-                    # Update room
-                    room = db.query(Room).get(game.room_id)
-                    room.status = GameStatus.FINISHED
-                    room.finished_at = datetime.utcnow()
-
-                else:
-                    # Switch turn
-                    game.current_turn = 2 if game.current_turn == 1 else 1
-
-                db.commit()
-
-                # Broadcast move
-                await self.sio.emit('move_made', {
-                    'game_id': game.id,
-                    'position': position,
-                    'player': current_player,
-                    'board': game.board_state,
-                    'current_turn': game.current_turn
-                }, room=room_code)
-
-                # Notify if game over
-                if winner is not None:
-                    result_msg = "Draw!" if winner == 0 else f"Player {winner} wins!"
-                    await self.sio.emit('game_over', {
-                        'game_id': game.id,
-                        'winner': winner,
-                        'result': result_msg,
-                        'board': game.board_state
-                    }, room=room_code)
+        except Exception as e:
+            print(f"Error in make_move: {str(e)}")
+            ERRORS.labels('make_move').inc()
+            await self.sio.emit('error', {'message': str(e)}, room=sid)
 
-            finally:
-                db.close()
+    async def _play_move(self, live_game: LiveGame, player_id: int, position: int):
+        """Apply a move to a live game, broadcast it and finish the game if it is over"""
+        winner = live_game.apply_move(player_id, position)
+        room_code = live_game.room_code
+        move_log.record(live_game.game_id, live_game.total_moves, player_id, position)
+
+        # Broadcast move (a game_over queued in the same tick shares its frame)
+        move_made = {
+            'game_id': live_game.game_id,
+            'position': position,
+            'player': player_id,
+            'board': live_game.board_state,
+            'current_turn': live_game.current_turn,
+            'move_number': live_game.total_moves
+        }
+        self.broadcaster.publish(room_code, 'move_made', move_made)
+        self.spectators.publish(room_code, 'move_made', move_made, delta=True)
+
+        # Notify if game over
+        if winner is not None:
+            await self._end_game(live_game, winner, "Draw!" if winner == 0 else f"Player {winner} wins!")
+
+        elif self.live_games.checkpoint_due(live_game):
+            await self._checkpoint_game(live_game)
+
+    async def _end_game(self, live_game: LiveGame, winner: int, result_msg: str, forfeit: bool = False):
+        """Take a finished game out of the live registry, announce it and persist it"""
+        room_code = live_game.room_code
+        self.live_games.remove(live_game.game_id)
+        await self.cluster.state.release_game(live_game.game_id, self.cluster.worker_id)
+
+        await room_directory.remove(live_game.room_id)
+        game_over = {
+            'game_id': live_game.game_id,
+            'winner': winner,
+            'result': result_msg,
+            'board': live_game.board_state,
+            'forfeit': forfeit
+        }
+        self.broadcaster.publish(room_code, 'game_over', game_over)
+        self.spectators.publish(room_code, 'game_over', game_over)
+        self.sessions.game_over(room_code, game_over)
+        self.chat.close_room(room_code)
+
+        await self._persist_finished_game(live_game, winner)
+
+    async def _get_bot_player_id(self, db: AsyncSession) -> int:
+        """Get or create the Player row the solver bot plays as"""
+        if self.bot_player_id is None:
+            bot = await db.scalar(select(Player).where(Player.username == settings.BOT_USERNAME))
+            if not bot:
+                bot = Player(username=settings.BOT_USERNAME, display_name="Bot")
+                db.add(bot)
+                await db.flush()
+                leaderboard.update_player(bot)
+            self.bot_player_id = bot.id
+        return self.bot_player_id
+
+    async def _load_live_game(self, game_id: int, room_code: str) -> Optional[LiveGame]:
+        """Load an in-progress game from the DB into the live registry"""
+        async with self.get_db() as db:
+            game = await db.get(Game, game_id)
+            if not game or game.status != GameStatus.IN_PROGRESS:
+                return None
+
+            # Bot games resume at the default difficulty
+            if self.bot_player_id is None:
+                self.bot_player_id = await db.scalar(
+                    select(Player.id).where(Player.username == settings.BOT_USERNAME)
+                )
+            bot_options = {}
+            if game.player2_id is not None and game.player2_id == self.bot_player_id:
+                bot_options = {
+                    'bot_player_id': game.player2_id,
+                    'bot_mistake_rate': settings.BOT_MISTAKE_RATES[settings.BOT_DEFAULT_DIFFICULTY]
+                }
+            return self.live_games.get(game_id) or self.live_games.add(
+                LiveGame.from_model(game, room_code, **bot_options)
+            )
+
+    async def _checkpoint_game(self, live_game: LiveGame):
+        """Persist the current board of a live game"""
+        total_moves = live_game.total_moves
+        async with self.get_db() as db:
+            # Conditional on the moves last written, so a stale copy never overwrites newer state
+            result = await db.execute(
+                update(Game)
+                .where(Game.id == live_game.game_id, Game.total_moves == live_game.persisted_moves)
+                .values(board_state=live_game.board_state, current_turn=live_game.current_turn,
+                        total_moves=total_moves)
+            )
+            await db.commit()
+
+        if not result.rowcount:
+            self._drop_stale_game(live_game)
+            return
+        live_game.persisted_moves = total_moves
+
+    async def _persist_finished_game(self, live_game: LiveGame, winner: int):
+        """Write the final state of a game, its room and the player stats"""
+        if winner == 1:
+            winner_id, result = live_game.player1_id, GameResult.PLAYER1_WIN
+        elif winner == 2:
+            winner_id, result = live_game.player2_id, GameResult.PLAYER2_WIN
+        else:
+            winner_id, result = None, GameResult.DRAW
+
+        finished_at = datetime.utcnow()
+        async with self.get_db() as db:
+            # Conditional like checkpoints: a game is finished (and counted in the stats) once
+            game = await db.scalar(
+                update(Game)
+                .where(
+                    Game.id == live_game.game_id,
+                    Game.total_moves == live_game.persisted_moves,
+                    Game.status == GameStatus.IN_PROGRESS
+                )
+                .values(
+                    board_state=live_game.board_state,
+                    current_turn=live_game.current_turn,
+                    total_moves=live_game.total_moves,
+                    status=GameStatus.FINISHED,
+                    finished_at=finished_at,
+                    winner_id=winner_id,
+                    result=result
+                )
+                .returning(Game)
+            )
+            if game is None:
+                self._drop_stale_game(live_game)
+                return
+            # Elo needs both ratings, also of players created on another worker
+            await leaderboard.load_missing(db, (game.player1_id, game.player2_id))
+
+            # Update room
+            await db.execute(
+                update(Room)
+                .where(Room.id == live_game.room_id)
+                .values(status=GameStatus.FINISHED, finished_at=finished_at)
+            )
+            await db.commit()
+            live_game.persisted_moves = live_game.total_moves
+
+        # Queue the player stats and let other workers update their leaderboards
+        await self._share_player_stats(self.game_service.update_player_stats(game))
+
+    async def _share_player_stats(self, deltas: List[dict]):
+        """Send stat deltas to the other workers, with the rows of players they may not have loaded"""
+        await self.cluster.broadcast({
+            'type': 'player_stats',
+            'deltas': deltas,
+            'players': [leaderboard.row(delta['player_id']) for delta in deltas]
+        })
+
+    def _drop_stale_game(self, live_game: LiveGame):
+        """The row moved on without this copy (another worker took the game over): forget it"""
+        print(f"Dropped stale live game {live_game.game_id}")
+        ERRORS.labels('stale_game').inc()
+        self.live_games.remove(live_game.game_id)
+        self.spectators.close_room(live_game.room_code)
+
+    async def handle_cluster_message(self, message: dict):
+        """Handle a message routed to this worker by another worker"""
+        if message['type'] == 'make_move':
+            await self._handle_move(
+                message['sid'], message['player_id'], message['room_code'],
+                message['game_id'], message['position'], message['move_number']
+            )
+        elif message['type'] == 'player_stats':
+            rows = message.get('players') or [None] * len(message['deltas'])
+            for delta, row in zip(message['deltas'], rows):
+                leaderboard.apply_remote_delta(delta, row)
+        elif message['type'] == 'room_directory':
+            room_directory.apply(message['op'], message['room'])
+        elif message['type'] == 'spectators':
+            for event, data, delta in message['events']:
+                self.spectators.publish(message['room_code'], event, data, delta, relay=False)
+
+    async def _relay_spectator_events(self, room_code: str, events: list):
+        """Pass a room's spectator events on when other workers have spectators in it"""
+        room = spectator_room(room_code)
+        local = sum(1 for _ in self.sio.manager.get_participants('/', room))
+        if await self.cluster.state.room_size(room) > local:
+            await self.cluster.broadcast({'type': 'spectators', 'room_code': room_code, 'events': events})
+
+    async def handle_spectate(self, sid: str, data: dict):
+        """
+        Watch a room's game: the spectator gets a snapshot, then the game
+        events (never chat or player presence) through the room's spectator
+        sub-room. Needs no player row and never takes a seat.
+        """
+        try:
+            room_code = data.get('room_code')
+            if sid in self.active_connections:
+                await self.sio.emit('error', {'message': 'Players cannot spectate'}, room=sid)
+                return
+
+            # Served from memory once the room has had a game event on this worker
+            snapshot = self.spectators.snapshot(room_code)
+            if snapshot is None:
+                async with self.get_db() as db:
+                    room = await find_room(db, room_code)
+                    if not room:
+                        await self.sio.emit('error', {'message': 'Room not found'}, room=sid)
+                        return
+                    game = await db.scalar(select(Game).where(Game.room_id == room.id))
+                    snapshot = {'room_code': room_code, 'variant': room.variant, 'status': GameStatus.WAITING.value}
+                    if game:
+                        snapshot.update({
+                            'game_id': game.id,
+                            'player1': await self._username(db, game.player1_id) if game.player1_id else None,
+                            'player2': await self._username(db, game.player2_id) if game.player2_id else None,
+                            **self._game_state(game),
+                            'status': game.status.value
+                        })
+                        if game.id in self.live_games:
+                            self.spectators.seed(room_code, snapshot)
+
+            await self._stop_spectating(sid)
+            room = spectator_room(room_code)
+            await self.sio.enter_room(sid, room)
+            self.spectating[sid] = room_code
+            # Spectator rooms are only tracked for the relay, not as active players
+            await self.cluster.state.add_room_member(room, sid, counted=False)
+            await self.sio.emit('spectating', snapshot, room=sid)
 
         except Exception as e:
-            print(f"Error in make_move: {str(e)}")
+            print(f"Error in spectate: {str(e)}")
+            ERRORS.labels('spectate').inc()
             await self.sio.emit('error', {'message': str(e)}, room=sid)
 
+    async def handle_stop_spectating(self, sid: str, data: dict):
+        await self._stop_spectating(sid)
+
+    async def _stop_spectating(self, sid: str):
+        room_code = self.spectating.pop(sid, None)
+        if room_code is None:
+            return
+        room = spectator_room(room_code)
+        await self.sio.leave_room(sid, room)
+        self.spectators.forget_sid(room_code, sid)
+        await self.cluster.state.remove_room_member(room, sid, counted=False)
+
+    async def handle_room_change(self, op: str, room: dict):
+        """Push a room directory diff to lobby clients and to the other workers' directories"""
+        self.broadcaster.publish(LOBBY_ROOM, 'lobby_update', {'op': op, 'room': room})
+        await self.cluster.broadcast({'type': 'room_directory', 'op': op, 'room': room})
+
+    async def handle_join_lobby(self, sid: str, data: dict):
+        """Send the open public rooms, then keep the client updated with lobby_update diffs"""
+        await self.sio.enter_room(sid, LOBBY_ROOM)
+        await self.sio.emit('lobby_rooms', {'rooms': room_directory.list()}, room=sid)
+
+    async def handle_leave_lobby(self, sid: str, data: dict):
+        await self.sio.leave_room(sid, LOBBY_ROOM)
+
+    async def reap(self):
+        """
+        Clean up after players who vanished (run periodically by the reaper):
+        forget sids whose connection is gone, drop empty room sets, forfeit
+        idle live games and expire rooms / games nobody came back to.
+        """
+        for sid in [sid for sid in self.active_connections if not self.sio.manager.is_connected(sid, '/')]:
+            await self.handle_disconnect(sid)
+            REAPED.labels('connection').inc()
+        for sid in [sid for sid in self.spectating if not self.sio.manager.is_connected(sid, '/')]:
+            await self._stop_spectating(sid)
+            REAPED.labels('connection').inc()
+
+        # Rooms with a player in the resume grace window keep their chat for the resume
+        for room_code in [
+            room_code for room_code, sids in self.rooms.items()
+            if not sids and not self.sessions.in_grace(room_code)
+        ]:
+            del self.rooms[room_code]
+            self.chat.close_room(room_code)
+
+        # Whoever was to move forfeits
+        for live_game in self.live_games.idle(settings.GAME_IDLE_TIMEOUT_SECONDS):
+            async with self.game_locks.hold(live_game.game_id):
+                # A move may have come in while waiting for the lock
+                if live_game.game_id not in self.live_games or not live_game.is_idle(
+                    settings.GAME_IDLE_TIMEOUT_SECONDS
+                ):
+                    continue
+                winner = 2 if live_game.current_turn == 1 else 1
+                await self._end_game(live_game, winner, f"Player {winner} wins by forfeit!", forfeit=True)
+            REAPED.labels('game').inc()
+
+        now = datetime.utcnow()
+        expired = await expire_waiting_rooms(
+            now - timedelta(seconds=settings.ROOM_IDLE_TIMEOUT_SECONDS), settings.REAPER_BATCH_SIZE,
+            occupied=self.cluster.state.room_size
+        )
+        REAPED.labels('room').inc(len(expired))
+        for room_id in expired:
+            await room_directory.remove(room_id)
+
+        # Games no worker has live have not seen a move since their owner went away
+        async def live(game_id: int) -> bool:
+            return await self.cluster.state.game_owner(game_id) is not None
+
+        forfeited = await forfeit_stale_games(
+            now - timedelta(seconds=settings.GAME_IDLE_TIMEOUT_SECONDS), settings.REAPER_BATCH_SIZE, live
+        )
+        REAPED.labels('game').inc(len(forfeited))
+        if forfeited:
+            async with self.get_db() as db:
+                await leaderboard.load_missing(db, (
+                    player_id for game in forfeited for player_id in (game.player1_id, game.player2_id)
+                ))
+        for game in forfeited:
+            await room_directory.remove(game.room_id)
+            await self._share_player_stats(self.game_service.update_player_stats(game))
+
+    async def count_active_players(self) -> int:
+        """Players in a room on any worker (spectators are not counted)"""
+        return await self.cluster.state.total_members()
+
     async def handle_ready(self, sid: str, data: dict):
         """Handle player ready status"""
         if sid not in self.active_connections:
@@ -230,9 +846,9 @@ class GameHandler:
         connection = self.active_connections[sid]
         room_code = connection['room_code']
 
-        await self.sio.emit('player_ready', {
+        self.broadcaster.publish(room_code, 'player_ready', {
             'username': connection['username']
-        }, room=room_code)
+        })
 
     async def handle_chat_message(self, sid: str, data: dict):
         """Handle chat messages in room"""
@@ -242,16 +858,24 @@ class GameHandler:
         connection = self.active_connections[sid]
         room_code = connection['room_code']
         message = data.get('message', '')
+        if not message:
+            return
 
-        if message:
-            await self.sio.emit('chat_message', {
-                'username': connection['username'],
-                'message': message,
-                'timestamp': datetime.utcnow().isoformat()
-            }, room=room_code)
+        try:
+            entry = self.chat.post(sid, room_code, connection['username'], message)
+        except ChatError as e:
+            await self.sio.emit('error', {'message': str(e)}, room=sid)
+            return
+
+        # Chat is the first thing shed when the room's queue backs up
+        self.broadcaster.publish(room_code, 'chat_message', entry, droppable=True)
 
     async def handle_disconnect(self, sid: str):
-        """Handle player disconnection"""
+        """Handle player disconnection (a seated player keeps the seat for the resume grace window)"""
+        self.matchmaking.remove(sid)
+        self.chat.forget_sid(sid)
+        await self._stop_spectating(sid)
+        session = self.sessions.detach(sid, self._session_expired)
         if sid not in self.active_connections:
             return
 
@@ -260,9 +884,85 @@ class GameHandler:
 
         if room_code in self.rooms:
             self.rooms[room_code].discard(sid)
+            if not self.rooms[room_code] and not self.sessions.in_grace(room_code):
+                self.chat.close_room(room_code)
+            await self.cluster.state.remove_room_member(room_code, sid)
             
-            await self.sio.emit('player_disconnected', {
-                'username': connection['username']
-            }, room=room_code)
+            if session is not None:
+                self.broadcaster.publish(room_code, 'player_reconnecting', {
+                    'username': connection['username'],
+                    'grace_seconds': self.sessions.grace_seconds
+                })
+            else:
+                self.broadcaster.publish(room_code, 'player_disconnected', {
+                    'username': connection['username']
+                })
+
+        del self.active_connections[sid]
+
+    def _session_expired(self, session: PlayerSession):
+        """A disconnected player did not come back within the grace window"""
+        self.broadcaster.publish(session.room_code, 'player_disconnected', {
+            'username': session.username
+        })
+        if not self.rooms.get(session.room_code) and not self.sessions.in_grace(session.room_code):
+            self.chat.close_room(session.room_code)
+
+    async def handle_resume(self, sid: str, data: dict):
+        """
+        Take a seat back with the resume token from room_joined / match_found
+        and get a snapshot of the room. Served from memory only: when this
+        worker can't answer (unknown or expired token, game neither live nor
+        finished here: still waiting, live on another worker or gone) the
+        client gets resume_failed and joins the room again.
+        """
+        token = (data or {}).get('token')
+        session = self.sessions.get(token) if token else None
+        live_game = self.live_games.get(session.game_id) if session else None
+        if session is None or (live_game is None and session.game_over is None):
+            await self.sio.emit('resume_failed', {'message': 'Session expired'}, room=sid)
+            return
 
-        del self.active_connections[sid]
\ No newline at end of file
+        # The old connection may not have been noticed as gone yet
+        old_sid = session.sid
+        self.sessions.resume(token, sid)
+        if old_sid is not None and old_sid != sid and old_sid in self.active_connections:
+            del self.active_connections[old_sid]
+            self.rooms.get(session.room_code, set()).discard(old_sid)
+            await self.sio.leave_room(old_sid, session.room_code)
+            await self.cluster.state.remove_room_member(session.room_code, old_sid)
+
+        room_code = session.room_code
+        await self.sio.enter_room(sid, room_code)
+        self.active_connections[sid] = {
+            'room_code': room_code,
+            'player_id': session.player_id,
+            'username': session.username
+        }
+        self.rooms.setdefault(room_code, set()).add(sid)
+        await self.cluster.state.add_room_member(room_code, sid)
+
+        if live_game is not None:
+            status, board = GameStatus.IN_PROGRESS.value, live_game.board_state
+            current_turn, move_number = live_game.current_turn, live_game.total_moves
+        else:
+            status, board = GameStatus.FINISHED.value, session.game_over['board']
+            current_turn, move_number = None, None
+
+        await self.sio.emit('resumed', {
+            'room_code': room_code,
+            'player_id': session.player_id,
+            'username': session.username,
+            'game_id': session.game_id,
+            'variant': session.variant,
+            'player_number': session.player_number,
+            'status': status,
+            'board': board,
+            'current_turn': current_turn,
+            'move_number': move_number,
+            'game_over': session.game_over,
+            'chat_history': self.chat.history(room_code)
+        }, room=sid)
+        self.broadcaster.publish(room_code, 'player_resumed', {
+            'username': session.username
+        }, skip_sid=sid)
\ No newline at end of file
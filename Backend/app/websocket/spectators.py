@@ -0,0 +1,172 @@
+import asyncio
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import socketio
+from engineio import packet as eio_packet
+from socketio import packet
+
+from app.core.config import settings
+from app.services.metrics import ERRORS, SPECTATOR_DELIVERIES, SPECTATOR_FRAMES
+from app.websocket.broadcast import BATCH_EVENT
+
+# Sent to a spectator that caught up after missing moves: the room's current state
+SYNC_EVENT = 'spectator_sync'
+
+# Game event fields kept as the room's current state
+STATE_FIELDS = ('game_id', 'variant', 'player1', 'player2', 'board', 'current_turn', 'move_number',
+                'winner', 'result', 'forfeit')
+STATUS_AFTER = {'game_started': 'in_progress', 'game_over': 'finished'}
+
+Pending = Tuple[str, Any, bool, bool]  # (event, data, delta, relay)
+
+
+def spectator_room(room_code: str) -> str:
+    """Socket.IO room of a game room's spectators"""
+    return f"{room_code}:spectators"
+
+
+class SpectatorFanout:
+    """
+    Game events for the spectators of a room, sent apart from the players.
+
+    Spectators sit in their own Socket.IO room, so player broadcasts never
+    include them. publish() only queues; a flush task per room serializes
+    the queued events once and hands that same packet to every spectator
+    socket on this worker, chunk_size sockets per event-loop turn, so moves
+    of other games are not held up behind a big audience.
+
+    A spectator whose send queue holds lag_backlog packets or more is skipped
+    for deltas (moves); once it has caught up it gets one spectator_sync with
+    the current state instead of the moves it missed. Other events (game
+    start and end) are always sent.
+    """
+
+    def __init__(self, sio: socketio.AsyncServer, chunk_size: int = settings.SPECTATOR_FANOUT_CHUNK,
+                 lag_backlog: int = settings.SPECTATOR_LAG_BACKLOG):
+        self.sio = sio
+        self.chunk_size = chunk_size
+        self.lag_backlog = lag_backlog
+        self._state: Dict[str, dict] = {}  # room_code -> current game state
+        self._pending: Dict[str, Deque[Pending]] = {}  # room_code -> events not sent yet
+        self._tasks: Dict[str, asyncio.Task] = {}  # room_code -> flush task
+        self._lagging: Dict[str, Set[str]] = {}  # room_code -> sids that missed deltas
+        # Passes events published here on to the other workers' spectators
+        self.relay: Optional[Callable[[str, List[Tuple[str, Any, bool]]], Awaitable[None]]] = None
+
+    @property
+    def pending(self) -> int:
+        return sum(len(events) for events in self._pending.values())
+
+    def snapshot(self, room_code: str) -> Optional[dict]:
+        state = self._state.get(room_code)
+        return dict(state) if state is not None else None
+
+    def seed(self, room_code: str, state: dict) -> None:
+        """Current state of a game no event has been published for yet"""
+        self._state.setdefault(room_code, dict(state, room_code=room_code))
+
+    def publish(self, room_code: str, event: str, data: dict, delta: bool = False, relay: bool = True) -> None:
+        """Queue a game event for the room's spectators (relay=False for events relayed by another worker)"""
+        state = self._state.get(room_code)
+        if state is None:
+            state = self._state[room_code] = {'room_code': room_code}
+        for field in STATE_FIELDS:
+            if field in data:
+                state[field] = data[field]
+        if event in STATUS_AFTER:
+            state['status'] = STATUS_AFTER[event]
+
+        events = self._pending.get(room_code)
+        if events is None:
+            events = self._pending[room_code] = deque()
+        events.append((event, data, delta, relay))
+        if room_code not in self._tasks:
+            self._tasks[room_code] = asyncio.create_task(self._flush_room(room_code))
+
+    def forget_sid(self, room_code: str, sid: str) -> None:
+        lagging = self._lagging.get(room_code)
+        if lagging is not None:
+            lagging.discard(sid)
+
+    def close_room(self, room_code: str) -> None:
+        self._state.pop(room_code, None)
+        self._lagging.pop(room_code, None)
+
+    async def stop(self) -> None:
+        """Send everything still queued"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _flush_room(self, room_code: str) -> None:
+        try:
+            while True:
+                # Let the players' frames for the same events go first
+                await asyncio.sleep(0)
+                events = self._pending.pop(room_code, None)
+                if not events:
+                    return
+                await self._send(room_code, list(events))
+        finally:
+            self._tasks.pop(room_code, None)
+
+    async def _send(self, room_code: str, events: List[Pending]) -> None:
+        try:
+            if self.relay is not None:
+                local = [(event, data, delta) for event, data, delta, relay in events if relay]
+                if local:
+                    await self.relay(room_code, local)
+            await self._fan_out(room_code, events)
+            state = self._state.get(room_code)
+            if state is not None and state.get('status') == STATUS_AFTER['game_over']:
+                self.close_room(room_code)
+        except Exception as e:
+            print(f"Error sending to spectators of {room_code}: {str(e)}")
+            ERRORS.labels('spectators').inc()
+
+    async def _fan_out(self, room_code: str, events: List[Pending]) -> None:
+        recipients = list(self.sio.manager.get_participants('/', spectator_room(room_code)))
+        if not recipients:
+            return
+
+        full = self._encode([(event, data) for event, data, _, _ in events])
+        essential_events = [(event, data) for event, data, delta, _ in events if not delta]
+        essential = self._encode(essential_events)
+        sync = None  # Encoded on first use
+        lagging = self._lagging.setdefault(room_code, set())
+        sent: Counter = Counter()
+
+        for index, (sid, eio_sid) in enumerate(recipients):
+            if index and index % self.chunk_size == 0:
+                await asyncio.sleep(0)
+            socket = self.sio.eio.sockets.get(eio_sid)
+            if socket is None or socket.closed:
+                continue
+            if self.lag_backlog and socket.queue.qsize() >= self.lag_backlog:
+                lagging.add(sid)
+                frame, kind = essential, 'essential'
+            elif sid in lagging:
+                lagging.discard(sid)
+                if sync is None:
+                    sync = self._encode(essential_events + [(SYNC_EVENT, self.snapshot(room_code))])
+                frame, kind = sync, 'sync'
+            else:
+                frame, kind = full, 'full'
+            if frame is not None:
+                await socket.send(frame)
+                sent[kind] += 1
+
+        SPECTATOR_FRAMES.inc()
+        for kind, count in sent.items():
+            SPECTATOR_DELIVERIES.labels(kind).inc(count)
+
+    def _encode(self, events: List[Tuple[str, Any]]) -> Optional[eio_packet.Packet]:
+        """Serialize events once into the Engine.IO packet every recipient gets"""
+        if not events:
+            return None
+        if len(events) == 1:
+            event, data = events[0]
+        else:
+            event, data = BATCH_EVENT, [{'event': event, 'data': data} for event, data in events]
+        encoded = self.sio.packet_class(packet.EVENT, namespace='/', data=[event, data]).encode()
+        return eio_packet.Packet(eio_packet.MESSAGE, encoded)
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark: bitboard Board vs the previous string-based board path.
+
+Run from Backend/:
+    python -m benchmarks.bench_board
+"""
+import random
+import timeit
+
+from app.services.bitboard import Board
+
+
+# Previous implementation, kept here as the reference point
+def string_check_winner(board: str):
+    b = list(board)
+    winning_combos = [
+        [0, 1, 2], [3, 4, 5], [6, 7, 8],
+        [0, 3, 6], [1, 4, 7], [2, 5, 8],
+        [0, 4, 8], [2, 4, 6],
+    ]
+    for combo in winning_combos:
+        if b[combo[0]] == b[combo[1]] == b[combo[2]] != '0':
+            return int(b[combo[0]])
+    if '0' not in b:
+        return 0
+    return None
+
+
+def string_is_valid_move(board: str, position: int) -> bool:
+    if not (0 <= position <= 8):
+        return False
+    return board[position] == '0'
+
+
+def string_available_moves(board: str) -> list:
+    return [i for i, cell in enumerate(board) if cell == '0']
+
+
+def random_positions(count: int, seed: int = 42) -> list:
+    """Random reachable positions (play stops as soon as someone wins)"""
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        cells = ['0'] * 9
+        order = list(range(9))
+        rng.shuffle(order)
+        for ply, cell in enumerate(order[:rng.randint(0, 9)]):
+            cells[cell] = '1' if ply % 2 == 0 else '2'
+            if string_check_winner(''.join(cells)) is not None:
+                break
+        positions.append(''.join(cells))
+    return positions
+
+
+def bench(label: str, func, number: int) -> float:
+    seconds = min(timeit.repeat(func, number=1, repeat=5))
+    per_op = seconds / number * 1e9
+    print(f"{label:<40} {per_op:8.1f} ns/op")
+    return per_op
+
+
+def main(count: int = 100_000):
+    states = random_positions(count)
+    boards = [Board.from_string(s) for s in states]
+    moves = [random.Random(i).randint(0, 8) for i in range(count)]
+
+    # Both paths must agree before comparing speed
+    for state, board in zip(states, boards):
+        assert board.to_string() == state
+        assert board.winner() == string_check_winner(state)
+        assert list(board.available_moves()) == string_available_moves(state)
+
+    print(f"{count} positions\n")
+    results = [
+        ("check_winner", string_check_winner, Board.winner),
+        ("available_moves", string_available_moves, Board.available_moves),
+    ]
+    for name, string_func, board_func in results:
+        old = bench(f"string {name}", lambda: [string_func(s) for s in states], count)
+        new = bench(f"bitboard {name}", lambda: [board_func(b) for b in boards], count)
+        print(f"{'speedup':<40} {old / new:8.1f}x\n")
+
+    pairs = list(zip(states, moves))
+    board_pairs = list(zip(boards, moves))
+    old = bench("string is_valid_move", lambda: [string_is_valid_move(s, m) for s, m in pairs], count)
+    new = bench("bitboard is_valid_move", lambda: [b.is_valid_move(m) for b, m in board_pairs], count)
+    print(f"{'speedup':<40} {old / new:8.1f}x\n")
+
+    bench("Board.from_string", lambda: [Board.from_string(s) for s in states], count)
+    bench("Board.to_string", lambda: [b.to_string() for b in boards], count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Matchmaking queue benchmark: join/leave cost and pairing pass time for queues
+of tens of thousands of players, plus how the pass scales with queue size.
+
+Run from Backend/:
+    python -m benchmarks.bench_matchmaking
+"""
+import gc
+import random
+import time
+
+from app.services.matchmaking import MatchmakingQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def fill(queue: MatchmakingQueue, clock: FakeClock, size: int, rng: random.Random, spread: int = 3000) -> float:
+    """Queue `size` players over 60 simulated seconds; returns seconds per join"""
+    start = time.perf_counter()
+    for i in range(size):
+        clock.now = 60.0 * i / size
+        queue.add(f"sid{i}", i, f"player{i}", rng.randint(0, spread), "classic")
+    return (time.perf_counter() - start) / size
+
+
+def timed_pair(queue: MatchmakingQueue, now: float):
+    """One pairing pass with the collector off, as timeit does"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        matches = queue.pair(now=now)
+        return matches, time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def main():
+    rng = random.Random(3)
+
+    # Dense ratings pair almost everyone at once; sparse ones need the window to widen
+    for size, spread in ((10_000, 3000), (20_000, 3000), (40_000, 3000), (40_000, 10_000_000)):
+        clock = FakeClock()
+        queue = MatchmakingQueue(base_window=30, window_growth=10, max_window=1000, clock=clock)
+        join = fill(queue, clock, size, rng, spread)
+
+        matches, first_pass = timed_pair(queue, 60.0)
+        # Rest of the queue, half a minute later when the windows have widened
+        later, second_pass = timed_pair(queue, 90.0)
+
+        gaps = sorted(second.rating - first.rating for first, second in matches + later)
+        print(f"{size:>6} players, ratings 0-{spread}: join {join * 1e6:.1f} us, "
+              f"pass {first_pass * 1000:.1f} ms ({len(matches)} pairs), "
+              f"second pass {second_pass * 1000:.1f} ms ({len(later)} pairs), "
+              f"left {len(queue)}, median gap {gaps[len(gaps) // 2] if gaps else 0}")
+
+    # Steady state: players keep arriving and a pass runs every 0.5 s
+    clock = FakeClock()
+    queue = MatchmakingQueue(base_window=30, window_growth=10, max_window=1000, clock=clock)
+    arrivals_per_second, seconds = 20_000, 30
+    sid = 0
+    paired = 0
+    pass_time = 0.0
+    for tick in range(seconds * 2):
+        for _ in range(arrivals_per_second // 2):
+            queue.add(f"sid{sid}", sid, f"player{sid}", rng.randint(0, 3000), "classic")
+            sid += 1
+        clock.now += 0.5
+        start = time.perf_counter()
+        paired += 2 * len(queue.pair())
+        pass_time += time.perf_counter() - start
+    print(f"steady state: {arrivals_per_second} joins/s for {seconds}s, "
+          f"{paired / seconds:.0f} players paired/s, "
+          f"mean pass {pass_time / (seconds * 2) * 1000:.2f} ms, {len(queue)} waiting at the end")
+
+    # Leaving the queue (disconnects) from a full queue
+    clock = FakeClock()
+    queue = MatchmakingQueue(base_window=30, window_growth=10, max_window=1000, clock=clock)
+    fill(queue, clock, 40_000, rng)
+    sids = [f"sid{i}" for i in range(40_000)]
+    rng.shuffle(sids)
+    start = time.perf_counter()
+    for sid in sids[:10_000]:
+        queue.remove(sid)
+    print(f"leave: {(time.perf_counter() - start) / 10_000 * 1e6:.1f} us per player (40k queue)")
+
+
+if __name__ == "__main__":
+    main()
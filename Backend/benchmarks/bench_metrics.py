@@ -0,0 +1,81 @@
+"""
+Metrics overhead benchmark: cost of recording on the hot path
+(counter, histogram, event decorator, REST middleware) and of rendering /metrics.
+
+Run from Backend/:
+    python -m benchmarks.bench_metrics
+"""
+import asyncio
+import time
+import timeit
+
+from app.services.metrics import (
+    HTTP_REQUEST_SECONDS, HTTP_REQUESTS, MetricsMiddleware, MetricsRegistry, instrument_event, registry
+)
+
+N = 200_000
+
+
+def per_call_ns(func, number: int = N) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+async def per_await_ns(func, number: int = N) -> float:
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e9
+
+
+async def main_async():
+    local = MetricsRegistry()
+    counter = local.counter('bench_total', 'bench')
+    labelled = local.counter('bench_labelled_total', 'bench', ['source'])
+    histogram = local.histogram('bench_seconds', 'bench', ['event']).labels('make_move')
+
+    print(f"counter.inc:                 {per_call_ns(counter.inc):6.0f} ns")
+    print(f"labels(...).inc:             {per_call_ns(lambda: labelled.labels('make_move').inc()):6.0f} ns")
+    print(f"histogram.observe:           {per_call_ns(lambda: histogram.observe(0.0123)):6.0f} ns")
+
+    async def handler(sid, data):
+        return None
+
+    instrumented = instrument_event('bench')(handler)
+    bare = await per_await_ns(lambda: handler('sid', {}))
+    wrapped = await per_await_ns(lambda: instrumented('sid', {}))
+    print(f"event handler, bare:         {bare:6.0f} ns")
+    print(f"event handler, instrumented: {wrapped:6.0f} ns  (+{wrapped - bare:.0f} ns per event)")
+
+    async def asgi_app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def receive():
+        return {'type': 'http.request'}
+
+    async def send(message):
+        pass
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/bench'}
+    middleware = MetricsMiddleware(asgi_app)
+    bare = await per_await_ns(lambda: asgi_app(scope, receive, send), N // 4)
+    wrapped = await per_await_ns(lambda: middleware(scope, receive, send), N // 4)
+    print(f"ASGI request, bare:          {bare:6.0f} ns")
+    print(f"ASGI request, middleware:    {wrapped:6.0f} ns  (+{wrapped - bare:.0f} ns per request)")
+
+    # A scrape with every app metric populated for a realistic number of series
+    for route in range(30):
+        for status in ('200', '404'):
+            HTTP_REQUESTS.labels('GET', f'/route/{route}', status).inc()
+        HTTP_REQUEST_SECONDS.labels('GET', f'/route/{route}').observe(0.01)
+    start = time.perf_counter()
+    body = registry.render()
+    print(f"render /metrics:             {(time.perf_counter() - start) * 1000:6.2f} ms "
+          f"({len(body.splitlines())} lines)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async())
@@ -0,0 +1,41 @@
+"""
+Solver benchmark: table build time and bot move latency. That the bot
+never loses is checked exhaustively by tests/test_solver.py.
+
+Run from Backend/:
+    python -m benchmarks.bench_solver
+"""
+import random
+import time
+import timeit
+
+from app.services.bitboard import Board
+from app.services.solver import Solver
+
+
+def main():
+    start = time.perf_counter()
+    solver = Solver().build()
+    print(f"build: {solver.positions} positions in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = random.Random(7)
+    boards = []
+    for _ in range(10_000):
+        board, to_move = Board(), 1
+        for _ in range(rng.randint(0, 7)):
+            if board.winner() is not None:
+                break
+            board.place(rng.choice(board.available_moves()), to_move)
+            to_move = 3 - to_move
+        if board.winner() is None:
+            boards.append(board)
+
+    for rate in (0.0, 0.25):
+        seconds = min(timeit.repeat(
+            lambda: [solver.choose_move(b, rate, rng) for b in boards], number=1, repeat=5
+        ))
+        print(f"choose_move (mistake rate {rate}): {seconds / len(boards) * 1e9:.0f} ns/move")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Spectator benchmark: player move latency (make_move handled until the
+mover's socket holds its move_made) with 0 and with 10k spectators.
+
+Runs GameHandler in this process against a fresh SQLite DB. Clients are
+Engine.IO sockets with a reader task draining each send queue, so only
+server-side work is measured. Scenarios:
+  none   - no spectators
+  fanout - spectators in the watched rooms' spectator sub-rooms (spectate)
+  room   - the same spectators put in the player rooms themselves, for
+           comparison with fanning out on the players' path
+
+Also reports how long spectators wait for a move after it was played and
+how many frames lagging spectators were spared.
+
+Run from Backend/:
+    python -m benchmarks.bench_spectators
+    python -m benchmarks.bench_spectators --spectators 10000 --games 50 --stalled 0.1 --lag-backlog 3
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.services.bitboard import Board
+
+SCENARIOS = ("none", "fanout", "room")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def room_events(data: str) -> List[Tuple[str, dict]]:
+    """(event, payload) pairs in an encoded Socket.IO event packet, batches unpacked"""
+    event, payload = json.loads(data[1:])
+    if event == 'batch':
+        return [(item['event'], item['data']) for item in payload]
+    return [(event, payload)]
+
+
+class FakeClient:
+    """
+    A connected sid whose Engine.IO socket is only a send queue, read by a
+    task. Frames are only timestamped while reading (decoding them would put
+    client work on the server's loop); received() decodes them afterwards.
+    """
+
+    def __init__(self, sid: str, socket):
+        self.sid = sid
+        self.socket = socket
+        self.frames: List[Tuple[float, str]] = []  # (arrived at, encoded packet)
+        self.task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def connect(cls, sio, eio_sid: str) -> "FakeClient":
+        from engineio.async_socket import AsyncSocket
+
+        socket = AsyncSocket(sio.eio, eio_sid)
+        socket.connected = True
+        sio.eio.sockets[eio_sid] = socket
+        sid = await sio.manager.connect(eio_sid, '/')
+        return cls(sid, socket)
+
+    def start_reading(self) -> None:
+        self.task = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        while True:
+            pkt = await self.socket.queue.get()
+            if isinstance(pkt.data, str) and pkt.data.startswith('2'):
+                self.on_frame(time.perf_counter(), pkt.data)
+
+    def on_frame(self, arrived: float, data: str) -> None:
+        self.frames.append((arrived, data))
+
+    def received(self) -> List[Tuple[float, str, dict]]:
+        """(arrived at, event, payload) of every event read"""
+        return [(arrived, event, payload) for arrived, data in self.frames for event, payload in room_events(data)]
+
+    async def close(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+
+class Player(FakeClient):
+    """Decodes as it reads, to see its own move come back"""
+
+    def __init__(self, sid: str, socket):
+        super().__init__(sid, socket)
+        self.waiting: Optional[Tuple[int, asyncio.Future]] = None  # (move_number, future)
+        self.game_id: Optional[int] = None
+
+    def on_frame(self, arrived: float, data: str) -> None:
+        for event, payload in room_events(data):
+            if event == 'room_joined':
+                self.game_id = payload['game_id']
+            elif event == 'move_made' and self.waiting and payload['move_number'] == self.waiting[0]:
+                move_number, future = self.waiting
+                self.waiting = None
+                future.set_result(arrived)
+
+    def expect_move(self, move_number: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiting = (move_number, future)
+        return future
+
+
+async def run_scenario(scenario: str, args, rng: random.Random) -> dict:
+    import socketio
+
+    from app.api.routes.room import RoomCreate, create_room
+    from app.database.session import AsyncSessionLocal
+    from app.services.metrics import SPECTATOR_DELIVERIES
+    from app.websocket.game_handler import GameHandler
+
+    sio = socketio.AsyncServer(async_mode='asgi')
+    handler = GameHandler(sio)
+    if args.lag_backlog is not None:
+        handler.spectators.lag_backlog = args.lag_backlog
+    prefix = scenario[:2].upper()
+    codes = [f"{prefix}{index:05d}" for index in range(args.games)]
+    watched = codes[:args.watched] if scenario != "none" else []
+
+    async with AsyncSessionLocal() as db:
+        for index, code in enumerate(codes):
+            await create_room(RoomCreate(name=f"bench {index}", code=code, created_by=f"{code}a"), db)
+
+    eio_ids = iter(range(10 ** 9))
+    pairs: List[Tuple[Player, Player]] = []
+    for code in codes:
+        pair = (
+            await Player.connect(sio, f"e{next(eio_ids)}"),
+            await Player.connect(sio, f"e{next(eio_ids)}")
+        )
+        for player, suffix in zip(pair, "ab"):
+            player.start_reading()
+            await handler.handle_join_room(player.sid, {'room_code': code, 'username': f"{code}{suffix}"})
+        pairs.append(pair)
+
+    spectators: List[FakeClient] = []
+    join_start = time.perf_counter()
+    for index in range(args.spectators if watched else 0):
+        code = watched[index % len(watched)]
+        spectator = await FakeClient.connect(sio, f"e{next(eio_ids)}")
+        if scenario == "fanout":
+            await handler.handle_spectate(spectator.sid, {'room_code': code})
+        else:
+            await sio.enter_room(spectator.sid, code)
+        # Stalled spectators never read their queue
+        if rng.random() >= args.stalled:
+            spectator.start_reading()
+        spectators.append(spectator)
+    join_seconds = time.perf_counter() - join_start
+
+    await handler.broadcaster.stop()
+    await handler.spectators.stop()
+    await asyncio.sleep(0.1)
+    delivered_before = {kind: SPECTATOR_DELIVERIES.labels(kind).value for kind in ('full', 'sync', 'essential')}
+
+    latencies: Dict[str, List[float]] = {code: [] for code in codes}
+    sent_at: Dict[Tuple[int, int], float] = {}  # (game_id, move_number) -> when the move was sent
+
+    async def play(code: str, pair: Tuple[Player, Player], game_rng: random.Random) -> None:
+        game_id = pair[0].game_id
+        board = Board()
+        moves = 0
+        while board.winner() is None:
+            position = game_rng.choice(board.available_moves())
+            mover = pair[moves % 2]
+            arrived = mover.expect_move(moves + 1)
+            started = time.perf_counter()
+            sent_at[(game_id, moves + 1)] = started
+            await handler.handle_make_move(mover.sid, {
+                'game_id': game_id, 'position': position, 'move_number': moves
+            })
+            latencies[code].append(await asyncio.wait_for(arrived, args.timeout) - started)
+            board.place(position, moves % 2 + 1)
+            moves += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        play(code, pair, random.Random(rng.random())) for code, pair in zip(codes, pairs)
+    ))
+    elapsed = time.perf_counter() - start
+    await handler.broadcaster.stop()
+    await handler.spectators.stop()
+    await asyncio.sleep(0.1)
+
+    for client in spectators + [player for pair in pairs for player in pair]:
+        await client.close()
+
+    # How long after being played each move reached each spectator
+    spectator_waits = sorted(
+        arrived - sent_at[(payload['game_id'], payload['move_number'])]
+        for spectator in spectators
+        for arrived, event, payload in spectator.received()
+        if event == 'move_made' and (payload['game_id'], payload['move_number']) in sent_at
+    )
+
+    everyone = sorted(latency for values in latencies.values() for latency in values)
+    watched_only = sorted(latency for code in watched for latency in latencies[code])
+    result = {
+        'scenario': scenario,
+        'spectators': len(spectators),
+        'moves': len(everyone),
+        'elapsed_seconds': round(elapsed, 3),
+        'spectator_join_us': round(join_seconds / len(spectators) * 1e6, 1) if spectators else 0.0,
+        'move_latency_ms': {
+            name: round(percentile(everyone, fraction) * 1000, 3)
+            for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+        },
+        'watched_move_latency_ms': {
+            name: round(percentile(watched_only, fraction) * 1000, 3)
+            for name, fraction in (('p50', 0.50), ('p99', 0.99))
+        },
+        'spectator_wait_ms': {
+            name: round(percentile(spectator_waits, fraction) * 1000, 3)
+            for name, fraction in (('p50', 0.50), ('p99', 0.99))
+        },
+    }
+    if scenario == "fanout":
+        result['spectator_frames'] = {
+            kind: int(SPECTATOR_DELIVERIES.labels(kind).value - count) for kind, count in delivered_before.items()
+        }
+    return result
+
+
+async def run(args) -> List[dict]:
+    from app.database.session import Base, engine
+    from app.services.move_log import move_log
+    from app.services.player_stats import player_stats
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await move_log.start()
+    await player_stats.start()
+    try:
+        rng = random.Random(args.seed)
+        return [await run_scenario(scenario, args, rng) for scenario in args.scenarios]
+    finally:
+        await move_log.stop()
+        await player_stats.stop()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--spectators', type=int, default=10_000)
+    parser.add_argument('--games', type=int, default=50, help="games played at once")
+    parser.add_argument('--watched', type=int, default=1, help="games the spectators are spread over")
+    parser.add_argument('--stalled', type=float, default=0.0, help="fraction of spectators that never read")
+    parser.add_argument('--lag-backlog', type=int, help="unsent frames before moves are skipped for a spectator "
+                                                          "(default: SPECTATOR_LAG_BACKLOG)")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for any one move")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings are read at import time, so the DB is chosen before importing the app
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'spectators.db')}"
+        # The handler logs connects and errors; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = asyncio.run(run(args))
+
+    for result in results:
+        latency, watched, waits = result['move_latency_ms'], result['watched_move_latency_ms'], result['spectator_wait_ms']
+        line = (f"{result['scenario']:<6} {result['spectators']:>6} spectators: "
+                f"move p50 {latency['p50']:.3f} ms, p95 {latency['p95']:.3f} ms, p99 {latency['p99']:.3f} ms "
+                f"(watched games p50 {watched['p50']:.3f} / p99 {watched['p99']:.3f} ms), "
+                f"{result['moves'] / result['elapsed_seconds']:.0f} moves/s")
+        if result['spectators']:
+            line += (f"; spectators get moves after p50 {waits['p50']:.1f} / p99 {waits['p99']:.1f} ms, "
+                     f"join {result['spectator_join_us']:.0f} us")
+        if 'spectator_frames' in result:
+            line += f", frames {result['spectator_frames']}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read at import time, so the DB is chosen before anything imports the app
+_db_dir = tempfile.mkdtemp(prefix="tictactoe-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+
+class FakeManager:
+    def __init__(self):
+        self.disconnected = set()
+
+    def is_connected(self, sid, namespace):
+        return sid not in self.disconnected
+
+    def get_participants(self, namespace, room):
+        return []
+
+
+class FakeSio:
+    """Stands in for the Socket.IO server: records what a handler emits"""
+
+    def __init__(self):
+        self.events = []
+        self.manager = FakeManager()
+
+    async def emit(self, event, data=None, room=None, skip_sid=None):
+        self.events.append((event, data, room))
+
+    async def enter_room(self, sid, room):
+        if sid in self.manager.disconnected:
+            raise KeyError(sid)
+
+    async def leave_room(self, sid, room):
+        pass
+
+    def emitted(self, event):
+        """(data, room) of every emit of event, batched room events included"""
+        found = []
+        for name, data, room in self.events:
+            if name == event:
+                found.append((data, room))
+            elif name == 'batch':
+                found.extend((item['data'], room) for item in data if item['event'] == event)
+        return found
+
+
+@pytest.fixture
+def sio():
+    return FakeSio()
@@ -0,0 +1,103 @@
+"""A batch that can't be written must not block the writer forever"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.database.session import AsyncSessionLocal, Base, engine
+from app.models.player import Game, Move, Player
+from app.services.batch_writer import BatchWriter
+from app.services.move_log import MoveLogWriter
+
+
+class FlakyWriter(BatchWriter):
+    name = "test writer"
+    permanent_errors = (IntegrityError,)
+
+    def __init__(self, fail_times=0, bad=(), **kwargs):
+        super().__init__(max_batch=100, flush_interval=60, **kwargs)
+        self.fail_times = fail_times
+        self.bad = set(bad)
+        self.written = []
+
+    async def _write(self, items):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("database unavailable")
+        if self.bad.intersection(items):
+            raise IntegrityError("INSERT", {}, Exception("duplicate key"))
+        self.written.extend(items)
+
+
+def test_failed_batch_is_retried_then_dropped():
+    async def run():
+        writer = FlakyWriter(fail_times=10, max_attempts=3)
+        for item in range(5):
+            writer.add(item)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await writer.flush()
+            assert len(writer) == 5
+        with pytest.raises(ConnectionError):
+            await writer.flush()
+        assert len(writer) == 0
+
+        writer.fail_times = 0
+        writer.add(5)
+        assert await writer.flush() == 1
+        assert writer.written == [5]
+
+    asyncio.run(run())
+
+
+def test_rejected_rows_are_dropped_alone():
+    async def run():
+        writer = FlakyWriter(bad={2, 4})
+        for item in range(6):
+            writer.add(item)
+        assert await writer.flush() == 4
+        assert writer.written == [0, 1, 3, 5]
+        assert len(writer) == 0
+
+    asyncio.run(run())
+
+
+def test_buffer_is_capped():
+    writer = FlakyWriter(max_pending=3)
+    for item in range(5):
+        writer.add(item)
+    assert writer._buffer == [2, 3, 4]
+
+
+def test_move_log_replaces_a_logged_ply():
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            player = Player(username="move_log_player", display_name="move_log_player")
+            db.add(player)
+            await db.flush()
+            game = Game(player1_id=player.id)
+            db.add(game)
+            await db.commit()
+            game_id, player_id = game.id, player.id
+
+        move_log = MoveLogWriter(max_batch=100, flush_interval=60)
+        move_log.record(game_id, 1, player_id, 4)
+        move_log.record(game_id, 2, player_id, 0)
+        await move_log.flush()
+        # The game was reloaded from a checkpoint and plays ply 2 again, twice in one batch
+        move_log.record(game_id, 2, player_id, 8)
+        move_log.record(game_id, 2, player_id, 6)
+        move_log.record(game_id, 3, player_id, 2)
+        assert await move_log.flush() == 3
+        assert len(move_log) == 0
+
+        async with AsyncSessionLocal() as db:
+            moves = (await db.execute(
+                select(Move.ply, Move.position).where(Move.game_id == game_id).order_by(Move.ply)
+            )).all()
+        assert [tuple(move) for move in moves] == [(1, 4), (2, 6), (3, 2)]
+
+    asyncio.run(run())
@@ -0,0 +1,31 @@
+"""The games export is a full dump"""
+import asyncio
+import json
+
+from app.api.routes.export import export_games
+from app.database.session import AsyncSessionLocal, Base, engine
+from app.models.player import Game, Player, Room
+
+
+def test_games_without_a_room_are_exported():
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            player = Player(username="export_player", display_name="export_player")
+            db.add(player)
+            await db.flush()
+            room = Room(code="EXPORT", name="export", created_by=player.id)
+            db.add(room)
+            await db.flush()
+            roomless, in_room = Game(player1_id=player.id), Game(player1_id=player.id, room_id=room.id)
+            db.add_all([roomless, in_room])
+            await db.commit()
+
+        response = await export_games()
+        rows = {row['id']: row for chunk in [chunk async for chunk in response.body_iterator]
+                for row in map(json.loads, chunk.splitlines())}
+        assert rows[roomless.id]['room_code'] is None
+        assert rows[in_room.id]['room_code'] == "EXPORT"
+
+    asyncio.run(run())
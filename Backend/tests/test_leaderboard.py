@@ -0,0 +1,52 @@
+"""Players created on another worker: their Elo and leaderboard entries"""
+import asyncio
+
+from app.database.session import AsyncSessionLocal, Base, engine
+from app.models.player import Game, Player
+from app.services.game_services import GameService
+from app.services.leaderboard import leaderboard
+from app.services.player_stats import player_stats
+
+
+def test_players_created_elsewhere_are_loaded_before_elo():
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            await leaderboard.rebuild(db)
+            # Created by another worker after this one built its leaderboard
+            strong = Player(username="elsewhere_strong", display_name="strong", rating=2000.0)
+            weak = Player(username="elsewhere_weak", display_name="weak", rating=1000.0)
+            db.add_all([strong, weak])
+            await db.commit()
+            assert leaderboard.get(strong.id) is None
+
+            game = Game(player1_id=strong.id, player2_id=weak.id, winner_id=strong.id)
+            await leaderboard.load_missing(db, (game.player1_id, game.player2_id))
+
+        assert leaderboard.get(strong.id).rating == 2000.0
+        deltas = GameService().update_player_stats(game)
+        player_stats._buffer.clear()
+        # The expected winner gains almost nothing (1500 vs 1500 would give K/2)
+        assert 0 < deltas[0]['rating'] < 1
+        assert leaderboard.get(weak.id).rating == 1000.0 - deltas[0]['rating']
+
+    asyncio.run(run())
+
+
+def test_remote_delta_of_an_unknown_player_adds_it():
+    leaderboard.apply_remote_delta(
+        {'player_id': 987654, 'total_games': 1, 'wins': 1, 'losses': 0, 'draws': 0, 'rating': 16.0},
+        {'player_id': 987654, 'username': "remote", 'display_name': "Remote", 'total_games': 1,
+         'wins': 1, 'losses': 0, 'draws': 0, 'rating': 1516.0}
+    )
+    entry = leaderboard.get(987654)
+    assert (entry.username, entry.wins, entry.rating) == ("remote", 1, 1516.0)
+
+    # Known now: later deltas are added to it
+    leaderboard.apply_remote_delta(
+        {'player_id': 987654, 'total_games': 1, 'wins': 0, 'losses': 1, 'draws': 0, 'rating': -16.0},
+        leaderboard.row(987654)
+    )
+    assert (entry.total_games, entry.losses, entry.rating) == (2, 1, 1500.0)
+    assert 987654 in [ranked.player_id for ranked in leaderboard.top('most_active', len(leaderboard))]
@@ -0,0 +1,94 @@
+"""Players paired in a pass whose matches could not be created wait for the next one"""
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.database.session import AsyncSessionLocal, Base, engine
+from app.models.player import Game
+from app.services.matchmaking import MatchmakingQueue
+from app.websocket.game_handler import GameHandler
+
+
+def make_queue(now):
+    return MatchmakingQueue(base_window=50, window_growth=10, max_window=500, clock=lambda: now[0])
+
+
+def test_requeue_keeps_the_wait():
+    now = [0.0]
+    queue = make_queue(now)
+    queue.add("a", 1, "alice", 1500, "classic")
+    queue.add("b", 2, "bob", 1510, "classic")
+    now[0] = 10.0
+    [(first, second)] = queue.pair()
+    assert len(queue) == 0
+
+    assert queue.requeue(first) and queue.requeue(second)
+    assert len(queue) == 2 and first.joined_at == 0.0
+    [(again_first, again_second)] = queue.pair()
+    assert {again_first.sid, again_second.sid} == {"a", "b"}
+
+
+def test_requeue_skips_a_sid_queued_again():
+    now = [0.0]
+    queue = make_queue(now)
+    queue.add("a", 1, "alice", 1500, "classic")
+    queue.add("b", 2, "bob", 1510, "classic")
+    [(first, second)] = queue.pair()
+    queue.add("a", 1, "alice", 1500, "five")
+
+    assert not queue.requeue(first)
+    assert queue.requeue(second)
+    assert len(queue) == 2
+    assert queue.pair() == []
+
+
+def match_handler(sio):
+    handler = GameHandler(sio)
+    handler.matchmaking.add("a", 1, "alice", 1500, "classic")
+    handler.matchmaking.add("b", 2, "bob", 1500, "classic")
+    return handler
+
+
+async def count_games():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(Game))
+
+
+def test_disconnected_player_is_not_matched(sio):
+    async def run():
+        before = await count_games()
+        handler = match_handler(sio)
+        matches = handler.matchmaking.pair()
+        sio.manager.disconnected.add("b")
+        await handler.create_matches(matches)
+
+        assert await count_games() == before
+        assert "a" in handler.matchmaking and "b" not in handler.matchmaking
+
+    asyncio.run(run())
+
+
+def test_match_that_cannot_be_seated_is_undone(sio):
+    async def run():
+        before = await count_games()
+        handler = match_handler(sio)
+        matches = handler.matchmaking.pair()
+        insert_matches = handler._insert_matches
+
+        async def insert_then_disconnect(matches):
+            # b goes away while the rows are inserted
+            created = await insert_matches(matches)
+            sio.manager.disconnected.add("b")
+            return created
+
+        handler._insert_matches = insert_then_disconnect
+        await handler.create_matches(matches)
+
+        assert await count_games() == before
+        assert len(handler.live_games) == 0
+        assert "a" in handler.matchmaking and "a" not in handler.active_connections
+        assert sio.emitted('queue_joined')[-1][1] == "a"
+
+    asyncio.run(run())
@@ -0,0 +1,29 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    cursor = encode_cursor("2024-01-02T03:04:05", 42)
+    assert decode_cursor(cursor, str, int) == ["2024-01-02T03:04:05", 42]
+
+
+@pytest.mark.parametrize("values, types", [
+    (["x"], (int,)),              # id is not an int
+    ([True], (int,)),             # bools are not ids
+    ([1.5], (int,)),
+    (["2024-01-02", "7"], (str, int)),
+    ([7, 7], (str, int)),
+    ([1, 2], (int,)),             # wrong length
+])
+def test_rejects_tampered_values(values, types):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(encode_cursor(*values), *types)
+    assert raised.value.status_code == 400
+
+
+def test_rejects_garbage():
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor("not a cursor!", int)
+    assert raised.value.status_code == 400
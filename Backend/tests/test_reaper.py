@@ -0,0 +1,71 @@
+"""Cleanup of idle games and rooms, and how its results are reported"""
+import asyncio
+from datetime import datetime, timedelta
+
+from app.api.routes.stats import get_player_stats
+from app.database.session import AsyncSessionLocal, Base, engine
+from app.models.player import Game, GameStatus, Move, Player, Room
+from app.services.reaper import expire_waiting_rooms, forfeit_stale_games
+
+
+def test_only_games_without_recent_moves_are_forfeited():
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        now = datetime.utcnow()
+        long_ago = now - timedelta(hours=2)
+        async with AsyncSessionLocal() as db:
+            players = [Player(username=f"reaper{i}", display_name=f"reaper{i}") for i in range(2)]
+            db.add_all(players)
+            await db.flush()
+            games = [
+                Game(player1_id=players[0].id, player2_id=players[1].id,
+                     status=GameStatus.IN_PROGRESS, started_at=long_ago, current_turn=2)
+                for _ in range(3)
+            ]
+            db.add_all(games)
+            await db.flush()
+            active, idle, silent = games
+            db.add_all([
+                Move(game_id=active.id, ply=1, player_id=players[0].id, position=4, created_at=long_ago),
+                Move(game_id=active.id, ply=2, player_id=players[1].id, position=0, created_at=now),
+                Move(game_id=idle.id, ply=1, player_id=players[0].id, position=4, created_at=long_ago),
+            ])
+            await db.commit()
+            ids = {game.id for game in games}
+
+        async def live(game_id):
+            return False
+
+        forfeited = await forfeit_stale_games(now - timedelta(minutes=10), 100, live)
+        assert {game.id for game in forfeited if game.id in ids} == {idle.id, silent.id}
+        assert all(game.winner_id == players[0].id for game in forfeited if game.id in ids)
+
+    asyncio.run(run())
+
+
+def test_expired_rooms_stay_out_of_player_stats():
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        long_ago = datetime.utcnow() - timedelta(hours=2)
+        async with AsyncSessionLocal() as db:
+            player = Player(username="reaper_alone", display_name="reaper_alone")
+            db.add(player)
+            await db.flush()
+            room = Room(code="ALONE", name="alone", created_by=player.id, created_at=long_ago)
+            db.add(room)
+            await db.flush()
+            db.add(Game(room_id=room.id, player1_id=player.id, status=GameStatus.WAITING))
+            await db.commit()
+            player_id = player.id
+
+        async def occupied(code):
+            return False
+
+        assert room.id in await expire_waiting_rooms(datetime.utcnow() - timedelta(minutes=30), 100, occupied)
+        async with AsyncSessionLocal() as db:
+            stats = await get_player_stats(player_id, db)
+        assert stats['recent_games'] == []
+
+    asyncio.run(run())
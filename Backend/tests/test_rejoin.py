@@ -0,0 +1,63 @@
+"""Players coming back to a game: rejoining gets the live position, resuming the chat"""
+import asyncio
+
+from app.api.routes.room import RoomCreate, create_room
+from app.database.session import AsyncSessionLocal, Base, engine
+from app.websocket.game_handler import GameHandler
+
+
+def test_rejoin_gets_live_board_and_turn(sio):
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            await create_room(RoomCreate(name="rejoin", code="REJOIN", created_by="rejoin_a"), db)
+
+        handler = GameHandler(sio)
+        await handler.handle_join_room("a", {'room_code': "REJOIN", 'username': "rejoin_a"})
+        await handler.handle_join_room("b", {'room_code': "REJOIN", 'username': "rejoin_b"})
+        game_id = next(data['game_id'] for event, data, room in sio.events if event == 'room_joined')
+        await handler.handle_make_move("a", {'game_id': game_id, 'position': 4, 'move_number': 0})
+
+        sio.events.clear()
+        await handler.handle_join_room("b2", {'room_code': "REJOIN", 'username': "rejoin_b"})
+        await handler.broadcaster.stop()
+        await handler.spectators.stop()
+
+        [(joined, _)] = sio.emitted('room_joined')
+        assert joined['board'] == "000010000"
+        assert joined['current_turn'] == 2 and joined['move_number'] == 1
+        started = [data for data, room in sio.emitted('game_started')]
+        assert started and all(data['current_turn'] == 2 and data['board'] == "000010000" for data in started)
+
+    asyncio.run(run())
+
+
+def test_reaper_keeps_chat_of_rooms_in_grace(sio):
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            await create_room(RoomCreate(name="grace", code="GRACE", created_by="grace_a"), db)
+
+        handler = GameHandler(sio)
+        await handler.handle_join_room("a", {'room_code': "GRACE", 'username': "grace_a"})
+        await handler.handle_join_room("b", {'room_code': "GRACE", 'username': "grace_b"})
+        await handler.handle_chat_message("a", {'room_code': "GRACE", 'message': "brb"})
+        for sid in ("a", "b"):
+            sio.manager.disconnected.add(sid)
+            await handler.handle_disconnect(sid)
+
+        await handler.reap()
+        await handler.broadcaster.stop()
+        await handler.spectators.stop()
+        assert [message['message'] for message in handler.chat.history("GRACE")] == ["brb"]
+
+        resume_token = next(data['resume_token'] for data, room in sio.emitted('room_joined')
+                            if data['username'] == "grace_a")
+        sio.events.clear()
+        await handler.handle_resume("a2", {'token': resume_token})
+        [(resumed, _)] = sio.emitted('resumed')
+        assert [message['message'] for message in resumed['chat_history']] == ["brb"]
+
+    asyncio.run(run())
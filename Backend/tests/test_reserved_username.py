@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.database.session import AsyncSessionLocal
+from app.services.lookups import ReservedUsernameError, get_or_create_player, is_reserved_username
+
+
+@pytest.mark.parametrize("username", [settings.BOT_USERNAME, settings.BOT_USERNAME.upper(), f" {settings.BOT_USERNAME} "])
+def test_bot_username_is_reserved(username):
+    assert is_reserved_username(username)
+
+    async def create():
+        async with AsyncSessionLocal() as db:
+            await get_or_create_player(db, username)
+
+    with pytest.raises(ReservedUsernameError):
+        asyncio.run(create())
+
+
+def test_other_usernames_are_free():
+    assert not is_reserved_username("alice")
+    assert not is_reserved_username(f"{settings.BOT_USERNAME}2")
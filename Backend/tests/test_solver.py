@@ -0,0 +1,56 @@
+"""The bot at mistake rate 0 never loses, whichever side it plays"""
+import random
+
+import pytest
+
+from app.services.bitboard import Board
+from app.services.solver import Solver
+
+
+@pytest.fixture(scope="module")
+def solver():
+    return Solver().build()
+
+
+def count_bot_losses(solver: Solver, bot: int) -> tuple:
+    """Walk every line of play the opponent can choose; return (games, bot losses)"""
+    games = losses = 0
+    stack = [(Board(), 1)]
+    while stack:
+        board, to_move = stack.pop()
+        winner = board.winner()
+        if winner is not None:
+            games += 1
+            if winner not in (0, bot):
+                losses += 1
+            continue
+
+        if to_move == bot:
+            # The bot may pick any of its best moves: all of them must hold
+            moves = solver.best_moves(board)
+        else:
+            moves = board.available_moves()
+
+        for position in moves:
+            child = board.copy()
+            child.place(position, to_move)
+            stack.append((child, 3 - to_move))
+    return games, losses
+
+
+@pytest.mark.parametrize("bot", [1, 2])
+def test_bot_never_loses(solver, bot):
+    games, losses = count_bot_losses(solver, bot)
+    assert games > 0
+    assert losses == 0
+
+
+def test_choose_move_without_mistakes_plays_a_best_move(solver):
+    rng = random.Random(7)
+    board, to_move = Board(), 1
+    while board.winner() is None:
+        position = solver.choose_move(board, 0.0, rng)
+        assert position in solver.best_moves(board)
+        board.place(position, to_move)
+        to_move = 3 - to_move
+    assert board.winner() == 0
@@ -0,0 +1,33 @@
+"""Spectators get the live position and are not counted as players"""
+import asyncio
+
+from app.api.routes.room import RoomCreate, create_room
+from app.database.session import AsyncSessionLocal, Base, engine
+from app.websocket.game_handler import GameHandler
+
+
+def test_spectators_follow_the_live_game(sio):
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSessionLocal() as db:
+            await create_room(RoomCreate(name="watched", code="WATCH", created_by="watch_a"), db)
+
+        handler = GameHandler(sio)
+        await handler.handle_join_room("a", {'room_code': "WATCH", 'username': "watch_a"})
+        await handler.handle_join_room("b", {'room_code': "WATCH", 'username': "watch_b"})
+        await handler.handle_spectate("s", {'room_code': "WATCH"})
+        assert await handler.count_active_players() == 2
+
+        [(joined, _)] = [(data, room) for data, room in sio.emitted('room_joined') if data['username'] == "watch_a"]
+        await handler.handle_make_move("a", {'game_id': joined['game_id'], 'position': 4, 'move_number': 0})
+        # A rejoin publishes game_started again; it must not take the spectators back to the checkpoint
+        await handler.handle_join_room("b2", {'room_code': "WATCH", 'username': "watch_b"})
+        await handler.spectators.stop()
+        assert handler.spectators.snapshot("WATCH")['board'] == "000010000"
+
+        await handler.handle_stop_spectating("s", {})
+        await handler.broadcaster.stop()
+        assert await handler.count_active_players() == 3  # a, b and b2
+
+    asyncio.run(run())
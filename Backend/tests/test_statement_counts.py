@@ -0,0 +1,102 @@
+"""
+The game and player stats endpoints load players with joined eager loads:
+the number of statements they run must not grow with the number of rows.
+"""
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.api.routes.game import get_game, get_games
+from app.api.routes.stats import get_player_stats
+from app.database.session import AsyncSessionLocal, Base, engine
+from app.models.player import Game, GameResult, GameStatus, Player
+
+GAMES = 30
+
+
+@contextmanager
+def count_statements():
+    counts = Counter()
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        counts['total'] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        yield counts
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+
+
+async def seed():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        players = [Player(username=f"player{i}", display_name=f"Player {i}") for i in range(GAMES + 1)]
+        db.add_all(players)
+        await db.flush()
+        now = datetime.utcnow()
+        # player0 plays everyone, so its stats page has one opponent per game
+        db.add_all([
+            Game(
+                player1_id=players[0].id,
+                player2_id=players[i + 1].id,
+                winner_id=players[0].id,
+                status=GameStatus.FINISHED,
+                result=GameResult.PLAYER1_WIN,
+                total_moves=5,
+                created_at=now - timedelta(minutes=i),
+                finished_at=now - timedelta(minutes=i)
+            )
+            for i in range(GAMES)
+        ])
+        await db.commit()
+        return players[0].id
+
+
+@pytest.fixture(scope="module")
+def player_id():
+    return asyncio.run(seed())
+
+
+def run(endpoint, *args, **kwargs):
+    """Run an endpoint with its own session; returns (response, statements run)"""
+    async def call():
+        async with AsyncSessionLocal() as db:
+            return await endpoint(*args, db=db, **kwargs)
+
+    with count_statements() as counts:
+        response = asyncio.run(call())
+    return response, counts['total']
+
+
+@pytest.mark.parametrize("limit", [1, 10, GAMES])
+def test_get_games_statements_do_not_grow_with_page_size(player_id, limit):
+    page, statements = run(get_games, limit=limit)
+    assert len(page['items']) == limit
+    assert all(item['player2_username'] for item in page['items'])
+    assert statements == 1
+
+    # Following the cursor costs the same
+    if page['next_cursor']:
+        _, statements = run(get_games, limit=limit, cursor=page['next_cursor'])
+        assert statements == 1
+
+
+def test_get_game_statements(player_id):
+    game, statements = run(get_game, 1)
+    assert game['player1']['username'] == "player0"
+    assert game['winner']['username'] == "player0"
+    assert statements == 1
+
+
+def test_get_player_stats_statements(player_id):
+    stats, statements = run(get_player_stats, player_id)
+    assert len(stats['recent_games']) == 10
+    assert all(game['opponent'] for game in stats['recent_games'])
+    assert statements == 2
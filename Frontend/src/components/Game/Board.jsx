@@ -1,9 +1,13 @@
 import Cell from './Cell';
 
-export default function Board({ board, onCellClick, winningLine = [], disabled = false }) {
+export default function Board({ board, onCellClick, winningLine = [], disabled = false, width = 3 }) {
+  const compact = width > 3; // bigger variants need smaller cells
   return (
     <div className="bg-white/10 backdrop-blur-lg border border-white/20 rounded-2xl p-8">
-      <div className="grid grid-cols-3 gap-4 max-w-md mx-auto">
+      <div
+        className={`grid mx-auto ${compact ? 'gap-1 max-w-2xl' : 'gap-4 max-w-md'}`}
+        style={{ gridTemplateColumns: `repeat(${width}, minmax(0, 1fr))` }}
+      >
         {board.map((value, index) => (
           <Cell
             key={index}
@@ -11,6 +15,7 @@ export default function Board({ board, onCellClick, winningLine = [], disabled =
             onClick={() => onCellClick(index)}
             isWinning={winningLine.includes(index)}
             disabled={disabled}
+            compact={compact}
           />
         ))}
       </div>
@@ -1,4 +1,4 @@
-export default function Cell({ value, onClick, isWinning, disabled }) {
+export default function Cell({ value, onClick, isWinning, disabled, compact = false }) {
   const getColorClass = () => {
     if (!value) return '';
     return value === 'X' ? 'text-blue-400' : 'text-pink-400';
@@ -9,7 +9,8 @@ export default function Cell({ value, onClick, isWinning, disabled }) {
       onClick={onClick}
       disabled={disabled || value !== null}
       className={`
-        aspect-square rounded-xl text-5xl font-bold
+        aspect-square font-bold
+        ${compact ? 'rounded-md text-sm sm:text-lg' : 'rounded-xl text-5xl'}
         transition-all duration-300 transform
         ${value ? 'bg-white/20' : 'bg-white/10 hover:bg-white/20 hover:scale-105'}
         ${isWinning ? 'bg-yellow-500/30 ring-2 ring-yellow-400' : ''}
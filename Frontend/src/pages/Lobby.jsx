@@ -1,7 +1,9 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { ArrowLeft, Plus, Users, Lock, Unlock } from 'lucide-react';
+import { ArrowLeft, Plus, Users, Lock, Unlock, Eye } from 'lucide-react';
 import api from '../services/api';
+import { socket, connectSocket } from '../services/socket';
+import { getVariant } from '../services/variants';
 
 export default function Lobby() {
   const navigate = useNavigate();
@@ -20,20 +22,34 @@ export default function Lobby() {
   }, [username]);
 
   useEffect(() => {
-    loadRooms();
-    const interval = setInterval(loadRooms, 5000);
-    
-    return () => clearInterval(interval);
-  }, []);
+    connectSocket();
 
-  const loadRooms = async () => {
-    try {
-      const response = await api.get('/rooms');
-      setRooms(response.data);
-    } catch (err) {
-      console.error('Error loading rooms:', err);
-    }
-  };
+    // The server sends the open rooms once, then pushes every change
+    const joinLobby = () => socket.emit('join_lobby');
+    joinLobby();
+    // A new connection is not in the lobby room: join again for a fresh list
+    socket.io.on('reconnect', joinLobby);
+
+    socket.on('lobby_rooms', (data) => {
+      setRooms(data.rooms);
+    });
+
+    socket.on('lobby_update', ({ op, room }) => {
+      setRooms(prev => {
+        const others = prev.filter(r => r.id !== room.id);
+        if (op === 'remove') return others;
+        if (op === 'add') return [...others, room];
+        return prev.map(r => (r.id === room.id ? room : r));
+      });
+    });
+
+    return () => {
+      socket.io.off('reconnect', joinLobby);
+      socket.emit('leave_lobby');
+      socket.off('lobby_rooms');
+      socket.off('lobby_update');
+    };
+  }, []);
 
   const generateRoomCode = () => {
     return Math.random().toString(36).substring(2, 8).toUpperCase();
@@ -68,6 +84,10 @@ export default function Lobby() {
     navigate(`/game/${code}`, { state: { username } });
   };
 
+  const watchRoom = (code) => {
+    navigate(`/game/${code}`, { state: { username, spectator: true } });
+  };
+
   const joinByCode = () => {
     if (!username.trim()) {
       setError('Por favor ingresa tu nombre primero');
@@ -224,19 +244,31 @@ export default function Lobby() {
                         </div>
                         <div className="flex items-center gap-3 text-sm text-blue-200">
                           <span className="font-mono">{room.code}</span>
+                          {room.variant && room.variant !== 'classic' && (
+                            <span>{getVariant(room.variant).label}</span>
+                          )}
                           <span className="flex items-center gap-1">
                             <Users className="w-4 h-4" />
                             {room.players_count || 0}/2
                           </span>
                         </div>
                       </div>
-                      <button
-                        onClick={() => joinRoom(room.code)}
-                        disabled={(room.players_count || 0) >= 2}
-                        className="bg-blue-500 text-white px-4 py-2 rounded-lg hover:bg-blue-600 transition-all disabled:opacity-50 disabled:cursor-not-allowed"
-                      >
-                        Unirse
-                      </button>
+                      {(room.players_count || 0) >= 2 ? (
+                        <button
+                          onClick={() => watchRoom(room.code)}
+                          className="bg-purple-500 text-white px-4 py-2 rounded-lg hover:bg-purple-600 transition-all flex items-center gap-2"
+                        >
+                          <Eye className="w-4 h-4" />
+                          Ver
+                        </button>
+                      ) : (
+                        <button
+                          onClick={() => joinRoom(room.code)}
+                          className="bg-blue-500 text-white px-4 py-2 rounded-lg hover:bg-blue-600 transition-all"
+                        >
+                          Unirse
+                        </button>
+                      )}
                     </div>
                   </div>
                 ))
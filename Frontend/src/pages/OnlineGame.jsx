@@ -1,41 +1,139 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams, useLocation, useNavigate } from 'react-router-dom';
 import { ArrowLeft, Users, Copy, Check } from 'lucide-react';
 import Board from '../components/Game/Board';
 import { socket, connectSocket } from '../services/socket';
+import { getVariant, emptyBoard, parseBoard, findLine } from '../services/variants';
 
 export default function OnlineGame() {
   const { roomCode } = useParams();
   const location = useLocation();
   const navigate = useNavigate();
   const username = location.state?.username || 'Player';
+  const spectator = Boolean(location.state?.spectator); // watches the game without a seat
 
-  const [board, setBoard] = useState(Array(9).fill(null));
+  const [variant, setVariant] = useState(getVariant('classic'));
+  const variantRef = useRef(variant); // read by the socket handlers below
+  const [board, setBoard] = useState(emptyBoard(variant));
   const [currentTurn, setCurrentTurn] = useState(1);
+  const [moveNumber, setMoveNumber] = useState(0); // echoed with every move so stale ones are rejected
   const [playerNumber, setPlayerNumber] = useState(null);
   const [gameId, setGameId] = useState(null);
   const [opponent, setOpponent] = useState(null);
+  const [players, setPlayers] = useState({ player1: null, player2: null }); // shown to spectators
   const [gameStatus, setGameStatus] = useState('waiting'); // waiting, playing, finished
   const [winner, setWinner] = useState(null);
   const [winningLine, setWinningLine] = useState([]);
   const [copied, setCopied] = useState(false);
   const [chatMessages, setChatMessages] = useState([]);
   const [messageInput, setMessageInput] = useState('');
+  const resumeToken = useRef(null); // takes the seat back after a dropped connection
 
   useEffect(() => {
     connectSocket();
 
-    // Join room
-    socket.emit('join_room', {
-      room_code: roomCode,
-      username: username
-    });
+    const toBoard = (state) => parseBoard(state, variantRef.current);
+
+    // The room's variant decides the board size and the winning line length
+    const applyVariant = (name) => {
+      const next = getVariant(name);
+      if (next !== variantRef.current) {
+        variantRef.current = next;
+        setVariant(next);
+        setBoard(emptyBoard(next));
+      }
+    };
+
+    // Join room (or watch it)
+    if (spectator) {
+      socket.emit('spectate', { room_code: roomCode });
+    } else {
+      socket.emit('join_room', {
+        room_code: roomCode,
+        username: username
+      });
+    }
+
+    // Spectators get the game state on arrival and after missing moves
+    const applySnapshot = (data) => {
+      if (data.variant) applyVariant(data.variant);
+      setPlayers({ player1: data.player1, player2: data.player2 });
+      if (data.board) {
+        const newBoard = toBoard(data.board);
+        setBoard(newBoard);
+        if (data.status === 'finished' && data.winner) {
+          findWinningLine(newBoard);
+        }
+      }
+      if (data.current_turn) setCurrentTurn(data.current_turn);
+      if (data.status === 'finished') {
+        setGameStatus('finished');
+        setWinner(data.winner ?? null);
+      } else {
+        setGameStatus(data.status === 'in_progress' ? 'playing' : 'waiting');
+      }
+    };
+    socket.on('spectating', applySnapshot);
+    socket.on('spectator_sync', applySnapshot);
 
     // Listen for events
     socket.on('room_joined', (data) => {
       console.log('Room joined:', data);
+      applyVariant(data.variant);
+      setPlayerNumber(data.player_number);
+      setGameId(data.game_id);
+      setMoveNumber(data.move_number);
+      // Rejoining mid-game: redraw the position and whose turn it is
+      if (data.board) setBoard(toBoard(data.board));
+      if (data.current_turn) setCurrentTurn(data.current_turn);
+      setChatMessages(data.chat_history || []);
+      resumeToken.current = data.resume_token;
+    });
+
+    const handleReconnect = () => {
+      if (spectator) {
+        socket.emit('spectate', { room_code: roomCode });
+      } else if (resumeToken.current) {
+        socket.emit('resume', { token: resumeToken.current });
+      } else {
+        socket.emit('join_room', { room_code: roomCode, username: username });
+      }
+    };
+    socket.io.on('reconnect', handleReconnect);
+
+    socket.on('resumed', (data) => {
+      console.log('Resumed:', data);
+      applyVariant(data.variant);
+      const newBoard = toBoard(data.board);
+      setBoard(newBoard);
       setPlayerNumber(data.player_number);
       setGameId(data.game_id);
+      setChatMessages(data.chat_history || []);
+      if (data.game_over) {
+        setGameStatus('finished');
+        setWinner(data.game_over.winner);
+        if (data.game_over.winner !== 0) {
+          findWinningLine(newBoard);
+        }
+        return;
+      }
+      setGameStatus(data.status === 'in_progress' ? 'playing' : 'waiting');
+      setCurrentTurn(data.current_turn);
+      setMoveNumber(data.move_number);
+    });
+
+    socket.on('resume_failed', () => {
+      // Seat expired, or the game isn't live on this server: join from scratch
+      resumeToken.current = null;
+      socket.emit('join_room', { room_code: roomCode, username: username });
+    });
+
+    socket.on('player_reconnecting', (data) => {
+      console.log('Player reconnecting:', data);
+    });
+
+    socket.on('player_resumed', (data) => {
+      console.log('Player resumed:', data);
     });
 
     socket.on('player_joined', (data) => {
@@ -48,7 +146,10 @@ export default function OnlineGame() {
     socket.on('game_started', (data) => {
       console.log('Game started:', data);
       setGameStatus('playing');
+      if (data.board) setBoard(toBoard(data.board));
       setCurrentTurn(data.current_turn);
+      setMoveNumber(data.move_number);
+      setPlayers({ player1: data.player1, player2: data.player2 });
       if (data.player1 !== username) {
         setOpponent(data.player1);
       } else {
@@ -58,24 +159,15 @@ export default function OnlineGame() {
 
     socket.on('move_made', (data) => {
       console.log('Move made:', data);
-      const newBoard = data.board.split('').map(c => {
-        if (c === '0') return null;
-        if (c === '1') return 'X';
-        if (c === '2') return 'O';
-        return null;
-      });
+      const newBoard = toBoard(data.board);
       setBoard(newBoard);
       setCurrentTurn(data.current_turn);
+      setMoveNumber(data.move_number);
     });
 
     socket.on('game_over', (data) => {
       console.log('Game over:', data);
-      const newBoard = data.board.split('').map(c => {
-        if (c === '0') return null;
-        if (c === '1') return 'X';
-        if (c === '2') return 'O';
-        return null;
-      });
+      const newBoard = toBoard(data.board);
       setBoard(newBoard);
       setGameStatus('finished');
       setWinner(data.winner);
@@ -98,12 +190,24 @@ export default function OnlineGame() {
 
     socket.on('error', (data) => {
       console.error('Socket error:', data);
+      if (data.move_number !== undefined) {
+        // Stale move: catch up and let the player try again
+        setMoveNumber(data.move_number);
+        return;
+      }
       alert(data.message);
     });
 
     return () => {
-      socket.emit('leave_room', { room_code: roomCode });
+      socket.emit(spectator ? 'stop_spectating' : 'leave_room', { room_code: roomCode });
+      socket.off('spectating');
+      socket.off('spectator_sync');
       socket.off('room_joined');
+      socket.io.off('reconnect', handleReconnect);
+      socket.off('resumed');
+      socket.off('resume_failed');
+      socket.off('player_reconnecting');
+      socket.off('player_resumed');
       socket.off('player_joined');
       socket.off('game_started');
       socket.off('move_made');
@@ -112,21 +216,12 @@ export default function OnlineGame() {
       socket.off('chat_message');
       socket.off('error');
     };
-  }, [roomCode, username, navigate]);
+  }, [roomCode, username, spectator, navigate]);
 
   const findWinningLine = (squares) => {
-    const lines = [
-      [0, 1, 2], [3, 4, 5], [6, 7, 8],
-      [0, 3, 6], [1, 4, 7], [2, 5, 8],
-      [0, 4, 8], [2, 4, 6]
-    ];
-
-    for (let line of lines) {
-      const [a, b, c] = line;
-      if (squares[a] && squares[a] === squares[b] && squares[a] === squares[c]) {
-        setWinningLine(line);
-        return;
-      }
+    const line = findLine(squares, variantRef.current);
+    if (line.length) {
+      setWinningLine(line);
     }
   };
 
@@ -137,7 +232,8 @@ export default function OnlineGame() {
 
     socket.emit('make_move', {
       game_id: gameId,
-      position: index
+      position: index,
+      move_number: moveNumber
     });
   };
 
@@ -157,9 +253,12 @@ export default function OnlineGame() {
     setMessageInput('');
   };
 
-  const isMyTurn = currentTurn === playerNumber;
-  const mySymbol = playerNumber === 1 ? 'X' : 'O';
-  const opponentSymbol = playerNumber === 1 ? 'O' : 'X';
+  // Spectators see player 1 on the left, as if they were sitting there
+  const isMyTurn = spectator ? currentTurn === 1 : currentTurn === playerNumber;
+  const mySymbol = playerNumber === 2 ? 'O' : 'X';
+  const opponentSymbol = playerNumber === 2 ? 'X' : 'O';
+  const leftName = spectator ? players.player1 || 'Esperando...' : username;
+  const rightName = spectator ? players.player2 : opponent;
 
   return (
     <div className="min-h-screen p-4 py-8">
@@ -200,8 +299,8 @@ export default function OnlineGame() {
                 <div className="flex items-center gap-3">
                   <div className="text-3xl">{mySymbol}</div>
                   <div>
-                    <div className="text-white font-semibold">{username}</div>
-                    <div className="text-sm text-blue-200">Tú</div>
+                    <div className="text-white font-semibold">{leftName}</div>
+                    <div className="text-sm text-blue-200">{spectator ? 'Jugador 1' : 'Tú'}</div>
                   </div>
                 </div>
               </div>
@@ -213,9 +312,9 @@ export default function OnlineGame() {
                   <div className="text-3xl">{opponentSymbol}</div>
                   <div>
                     <div className="text-white font-semibold">
-                      {opponent || 'Esperando...'}
+                      {rightName || 'Esperando...'}
                     </div>
-                    <div className="text-sm text-blue-200">Oponente</div>
+                    <div className="text-sm text-blue-200">{spectator ? 'Jugador 2' : 'Oponente'}</div>
                   </div>
                 </div>
               </div>
@@ -238,7 +337,9 @@ export default function OnlineGame() {
               {gameStatus === 'playing' && (
                 <div>
                   <h2 className="text-xl text-white font-semibold mb-2">
-                    {isMyTurn ? '¡Tu turno!' : 'Turno del oponente'}
+                    {spectator
+                      ? `Turno de ${isMyTurn ? leftName : rightName}`
+                      : isMyTurn ? '¡Tu turno!' : 'Turno del oponente'}
                   </h2>
                   <div className={`text-4xl font-bold ${
                     isMyTurn ? 'text-blue-400' : 'text-pink-400'
@@ -252,6 +353,10 @@ export default function OnlineGame() {
                 <div>
                   {winner === 0 ? (
                     <h2 className="text-2xl font-bold text-yellow-400">¡Empate!</h2>
+                  ) : spectator ? (
+                    <h2 className="text-2xl font-bold text-green-400">
+                      Gana {winner === 1 ? leftName : rightName}
+                    </h2>
                   ) : winner === playerNumber ? (
                     <h2 className="text-2xl font-bold text-green-400">¡Ganaste!</h2>
                   ) : (
@@ -270,9 +375,10 @@ export default function OnlineGame() {
             {/* Board */}
             <Board
               board={board}
+              width={variant.width}
               onCellClick={handleCellClick}
               winningLine={winningLine}
-              disabled={gameStatus !== 'playing' || !isMyTurn}
+              disabled={spectator || gameStatus !== 'playing' || !isMyTurn}
             />
           </div>
 
@@ -296,6 +402,7 @@ export default function OnlineGame() {
               ))}
             </div>
 
+            {!spectator && (
             <div className="flex gap-2">
               <input
                 type="text"
@@ -312,6 +419,7 @@ export default function OnlineGame() {
                 Enviar
               </button>
             </div>
+            )}
           </div>
         </div>
       </div>
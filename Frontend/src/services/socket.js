@@ -24,6 +24,13 @@ export const connectSocket = () => {
     socket.on('connect_error', (error) => {
       console.error('🔴 Connection error:', error);
     });
+
+    // Room events sent together arrive as one frame: [{ event, data }, ...]
+    socket.on('batch', (events) => {
+      events.forEach(({ event, data }) => {
+        socket.listeners(event).forEach((listener) => listener(data));
+      });
+    });
   }
 
   return socket;
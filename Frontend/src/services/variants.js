@@ -0,0 +1,48 @@
+// Board variants, as defined in Backend/app/services/board_engine.py
+export const VARIANTS = {
+  classic: { label: 'Clásico', width: 3, height: 3, winLength: 3 },
+  five: { label: '5x5 · 4 en línea', width: 5, height: 5, winLength: 4 },
+  gomoku: { label: 'Gomoku 15x15', width: 15, height: 15, winLength: 5 }
+};
+
+export const getVariant = (name) => VARIANTS[name] || VARIANTS.classic;
+
+export const emptyBoard = (variant) => Array(variant.width * variant.height).fill(null);
+
+// Classic boards come as "000000000" (one digit per cell), the other
+// variants as "<player1 hex>:<player2 hex>" bitmasks (cell = row * width + col)
+export const parseBoard = (state, variant) => {
+  if (!state.includes(':')) {
+    return state.split('').map(c => (c === '1' ? 'X' : c === '2' ? 'O' : null));
+  }
+  const [player1, player2] = state.split(':').map(hex => BigInt(`0x${hex}`));
+  return emptyBoard(variant).map((_, index) => {
+    const bit = 1n << BigInt(index);
+    if (player1 & bit) return 'X';
+    if (player2 & bit) return 'O';
+    return null;
+  });
+};
+
+// Cells of the first line of winLength equal marks, or [] if there is none
+export const findLine = (cells, variant) => {
+  const { width, height, winLength } = variant;
+  const directions = [[0, 1], [1, 0], [1, 1], [1, -1]];
+  for (let index = 0; index < cells.length; index++) {
+    const value = cells[index];
+    if (!value) continue;
+    for (const [dRow, dCol] of directions) {
+      const line = [];
+      let row = Math.floor(index / width);
+      let col = index % width;
+      while (line.length < winLength && row >= 0 && row < height && col >= 0 && col < width
+             && cells[row * width + col] === value) {
+        line.push(row * width + col);
+        row += dRow;
+        col += dCol;
+      }
+      if (line.length === winLength) return line;
+    }
+  }
+  return [];
+};